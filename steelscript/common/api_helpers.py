@@ -19,29 +19,39 @@ class APIVersion:
         else:
             raise ValueError("Invalid type: %s" % type(v))
 
+        # precomputed comparison and hash key
+        self.key = (self.major, self.minor)
+
     def __str__(self):
         return "%s.%s" % (self.major, self.minor)
 
     def __repr__(self):
         return "<APIVersion {}>".format(str(self))
 
+    def __hash__(self):
+        return hash(self.key)
+
     def __eq__(self, other):
-        return (self.major, self.minor) == (other.major, other.minor)
+        if not isinstance(other, APIVersion):
+            return NotImplemented
+        return self.key == other.key
 
     def __ne__(self, other):
-        return (self.major, self.minor) != (other.major, other.minor)
+        if not isinstance(other, APIVersion):
+            return NotImplemented
+        return self.key != other.key
 
     def __lt__(self, other):
-        return (self.major, self.minor) < (other.major, other.minor)
+        return self.key < other.key
 
     def __le__(self, other):
-        return (self.major, self.minor) <= (other.major, other.minor)
+        return self.key <= other.key
 
     def __gt__(self, other):
-        return (self.major, self.minor) > (other.major, other.minor)
+        return self.key > other.key
 
     def __ge__(self, other):
-        return (self.major, self.minor) >= (other.major, other.minor)
+        return self.key >= other.key
 
 
 if __name__ == "__main__":
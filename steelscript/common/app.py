@@ -8,6 +8,9 @@ import sys
 import optparse
 
 from steelscript.common.service import UserAuth, OAuth
+from steelscript.common.datautils import Formatter
+from steelscript.common.datastructures import ResultTable
+from steelscript.common import export
 import steelscript.common.connection
 from steelscript.commands.steel import BaseCommand
 
@@ -29,12 +32,13 @@ class Application(BaseCommand):
         super(Application, self).__init__(*args, **kwargs)
         self.has_conn_options = False
         self.has_log_options = False
+        self.has_output_options = False
         self.auth = None
 
     def run(self):
         self.parse(sys.argv[1:])
 
-    def add_standard_options(self, conn=True, log=True):
+    def add_standard_options(self, conn=True, log=True, output=False):
         if conn:
             group = optparse.OptionGroup(self.parser, "Connection Parameters")
             group.add_option("-P", "--port", dest="port",
@@ -63,6 +67,23 @@ class Application(BaseCommand):
             self.parser.add_option_group(group)
             self.has_log_options = True
 
+        if output:
+            group = optparse.OptionGroup(self.parser, "Output Options")
+            group.add_option(
+                "--output-format", default=None,
+                choices=('table',) + export.FORMATS,
+                help="Format of results: table, %s (default table, or "
+                     "from the --output-file extension)"
+                     % ', '.join(export.FORMATS)
+            )
+            group.add_option(
+                "--output-file", default=None,
+                help="Write results to this file instead of stdout, "
+                     "the format defaults to the file extension"
+            )
+            self.parser.add_option_group(group)
+            self.has_output_options = True
+
     def validate_args(self):
         """ Hook for subclasses to add their own option/argument validation
         """
@@ -100,5 +121,66 @@ class Application(BaseCommand):
             steelscript.common.connection.Connection.REST_BODY_LINES = (
                 self.options.rest_body_lines)
 
+        if self.has_output_options:
+            fmt = self.output_format()
+            if fmt not in ('table', 'csv') and not self.options.output_file:
+                self.parser.error('--output-file is required for %s output'
+                                  % fmt)
+            if fmt not in ('table',) + export.available_formats():
+                self.parser.error('%s output requires the pyarrow package'
+                                  % fmt)
+
+    def output_format(self):
+        """ Return the format chosen by the output options
+
+            Without --output-format this is the format for the extension
+            of --output-file, or 'table' for other files and stdout.
+        """
+        fmt = self.options.output_format
+        if fmt is None:
+            fmt = 'table'
+            if self.options.output_file:
+                try:
+                    fmt = export.guess_format(self.options.output_file)
+                except ValueError:
+                    pass
+        return fmt
+
+    def write_output(self, data, headers=None):
+        """ Write a table of results as chosen by the output options
+
+            `data` is a ResultTable, or an iterable of rows as dicts or
+            lists of values.  `headers` is the list of column names, as
+            for `steelscript.common.export.write_table`.  It is required
+            for table output of rows given as lists.
+        """
+        fmt = self.output_format()
+        dest = self.options.output_file
+        if fmt == 'csv' and dest is None:
+            dest = sys.stdout
+        if fmt != 'table':
+            export.write_table(data, dest, format=fmt, headers=headers)
+            return
+
+        if isinstance(data, ResultTable):
+            headers = data.columns
+            rows = [row.values() for row in data]
+        else:
+            rows = list(data)
+            if headers is None and rows:
+                if not isinstance(rows[0], dict):
+                    raise ValueError('headers are required for list rows')
+                headers = list(rows[0].keys())
+            rows = [[row.get(h) for h in headers]
+                    if isinstance(row, dict) else row for row in rows]
+
+        if dest is None:
+            if headers:
+                Formatter.print_table(rows, headers)
+        else:
+            with open(dest, 'w') as f:
+                if headers:
+                    Formatter.print_table(rows, headers, stream=f)
+
     def main(self):
         pass
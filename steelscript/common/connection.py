@@ -12,8 +12,10 @@ import errno
 import urllib.request
 import urllib.parse
 import urllib.error
+import time
 import socket
 import logging
+import threading
 import tempfile
 import requests
 import mimetypes
@@ -26,6 +28,8 @@ from requests.adapters import HTTPAdapter
 from requests.structures import CaseInsensitiveDict
 from requests.packages.urllib3.util import parse_url
 from requests.packages.urllib3.poolmanager import PoolManager
+from requests.packages.urllib3.exceptions import (NewConnectionError,
+                                                  ConnectTimeoutError)
 
 from steelscript.common.exceptions import RvbdException, RvbdHTTPException, \
     RvbdConnectException
@@ -96,12 +100,154 @@ def test_tcp_conn(dest, port):
                                    errname=err_name)
 
 
+def _is_unreachable(exc):
+    """Return True if `exc` means the host never answered at the TCP level.
+
+    Retrying such a request with a different TLS version cannot help.
+    """
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    reason = exc.args[0] if exc.args else None
+    reason = getattr(reason, 'reason', reason)
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+class CircuitBreaker(object):
+    """ Track connection failures to a single host and fail fast when
+        the host appears to be down.
+
+        The breaker starts CLOSED, and requests flow normally.  After
+        `failure_threshold` consecutive connection failures it trips
+        OPEN, and every request is refused immediately with
+        `RvbdConnectException` instead of waiting for a TCP or TLS
+        timeout.  Once `reset_timeout` seconds have passed, the breaker
+        goes HALF_OPEN and lets a single trial request through: success
+        closes the circuit, failure opens it again for another
+        `reset_timeout` seconds.
+
+        Breakers are shared by all connections to the same host, use
+        `CircuitBreaker.for_host()` to get one.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    _breakers = {}
+    _breakers_lock = threading.Lock()
+
+    def __init__(self, host, failure_threshold=5, reset_timeout=30):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._trial_pending = False
+        self._trial_started = None
+
+    def __repr__(self):
+        return '<{0} {1} {2}>'.format(self.__class__.__name__, self.host,
+                                      self.state)
+
+    @classmethod
+    def for_host(cls, host, **kwargs):
+        """ Return the breaker shared by all connections to `host`.
+
+            `kwargs` are only used when the breaker is first created.
+        """
+        with cls._breakers_lock:
+            breaker = cls._breakers.get(host)
+            if breaker is None:
+                breaker = cls(host, **kwargs)
+                cls._breakers[host] = breaker
+            return breaker
+
+    @classmethod
+    def reset_all(cls):
+        """ Forget the state of all hosts. """
+        with cls._breakers_lock:
+            cls._breakers.clear()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        # caller must hold self._lock
+        if (self._state == self.OPEN and
+                time.monotonic() - self._opened_at >= self.reset_timeout):
+            self._state = self.HALF_OPEN
+            self._trial_pending = False
+        return self._state
+
+    def before_request(self):
+        """ Raise `RvbdConnectException` if requests to the host
+            should not be attempted right now.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and (
+                    not self._trial_pending or
+                    time.monotonic() - self._trial_started >=
+                    self.reset_timeout):
+                # a trial that never reported back does not block forever
+                self._trial_pending = True
+                self._trial_started = time.monotonic()
+                logger.info('Circuit for %s half-open, trying one request'
+                            % self.host)
+                return
+
+            if state == self.OPEN:
+                retry_in = (self.reset_timeout -
+                            (time.monotonic() - self._opened_at))
+            else:
+                retry_in = 0
+            msg = ('Circuit open for {0} after {1} connection failures, '
+                   'not retrying for {2:.1f} seconds'
+                   ''.format(self.host, self._failures, max(retry_in, 0)))
+        raise RvbdConnectException(msg)
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info('Circuit for %s closed' % self.host)
+            self._state = self.CLOSED
+            self._failures = 0
+            self._opened_at = None
+            self._trial_pending = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if (self._state == self.HALF_OPEN or
+                    self._failures >= self.failure_threshold):
+                if self._state != self.OPEN:
+                    logger.warning('Circuit for %s opened after %d '
+                                   'connection failures'
+                                   % (self.host, self._failures))
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_pending = False
+
+
 class Connection(object):
     """ Handle authentication and communication to remote machines. """
 
     REST_DEBUG = 0
     REST_BODY_LINES = 0
 
+    # Consecutive connection failures to a host before requests to it
+    # fail fast, and seconds to wait before trying it again.  Set
+    # CIRCUIT_FAILURE_THRESHOLD to 0 to disable the circuit breaker.
+    CIRCUIT_FAILURE_THRESHOLD = 5
+    CIRCUIT_RESET_TIMEOUT = 30
+
     def __init__(self, hostname, auth=None, port=None, verify=True,
                  reauthenticate_handler=None):
         """ Initialize new connection and setup authentication
@@ -145,6 +291,14 @@ class Connection(object):
         self.hostname = hostname
         self._ssladapter = False
 
+        if self.CIRCUIT_FAILURE_THRESHOLD:
+            self.breaker = CircuitBreaker.for_host(
+                self.hostname,
+                failure_threshold=self.CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=self.CIRCUIT_RESET_TIMEOUT)
+        else:
+            self.breaker = None
+
         self.conn = requests.session()
         self.conn.auth = auth
         self.conn.verify = verify
@@ -187,6 +341,8 @@ class Connection(object):
         p = parse_url(path)
         if not p.host:
             path = self.get_url(path)
+        if self.breaker is not None:
+            self.breaker.before_request()
         try:
             rest_logger.info('%s %s' % (method, str(path)))
             if params:
@@ -264,9 +420,11 @@ class Connection(object):
                                      % (len(lines) - 20))
 
         except (requests.exceptions.SSLError,
-                requests.exceptions.ConnectionError):
-            if self._ssladapter:
-                # If we've already applied an adapter, this is another problem
+                requests.exceptions.ConnectionError) as e:
+            if self._ssladapter or _is_unreachable(e):
+                # If we've already applied an adapter, or the host did not
+                # answer at all, this is another problem
+                self._record_failure()
                 raise
 
             # Otherwise, mount adapter and retry the request
@@ -274,9 +432,18 @@ class Connection(object):
             self.conn.mount('https://', SSLAdapter(ssl.PROTOCOL_TLSv1))
             self._ssladapter = True
             logger.info('SSL error -- retrying with TLSv1')
-            r = self.conn.request(method, path, data=body,
-                                  params=params, headers=extra_headers,
-                                  cookies=self.cookies, files=files)
+            try:
+                r = self.conn.request(method, path, data=body,
+                                      params=params, headers=extra_headers,
+                                      cookies=self.cookies, files=files)
+            except (requests.exceptions.SSLError,
+                    requests.exceptions.ConnectionError):
+                self._record_failure()
+                raise
+
+        # the host answered, even if only with an error status
+        if self.breaker is not None:
+            self.breaker.record_success()
 
         # check if good status response otherwise raise exception
         if not r.ok:
@@ -317,6 +484,10 @@ class Connection(object):
                     res = obj.__dict__
             return res
 
+    def _record_failure(self):
+        if self.breaker is not None:
+            self.breaker.record_failure()
+
     def _clear_cookies(self):
         self.conn.headers.pop('Cookie', None)
         if self.cookies:
@@ -5,8 +5,98 @@
 # as set forth in the License.
 
 
+import sys
 import json
+import weakref
 import inspect
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# values that JsonDict._decode converts
+_decoded_types = (dict, list, bytes)
+
+
+class _ClassDefaults(object):
+    """The merged `_default` of a JsonDict subclass, computed once per
+    class and recomputed if `_default` is reassigned on the class or any
+    of its bases."""
+
+    def __init__(self, cls):
+        mro = inspect.getmro(cls)
+        default = None
+        for c in reversed(mro):
+            try:
+                cd = c._default
+            except AttributeError:
+                continue
+            if cd is not None:
+                if default is None:
+                    default = {}
+                for key, value in cd.items():
+                    default[key] = value
+        self.default = default
+
+        # positions in the MRO of the classes that may set `_default`,
+        # and the `_default` each one set, to notice reassignments
+        self.positions = tuple(i for i, c in enumerate(mro)
+                               if issubclass(c, JsonDict) or
+                               '_default' in c.__dict__)
+        self.sources = tuple(mro[i].__dict__.get('_default')
+                             for i in self.positions)
+
+        # The shortcuts below bypass update, __setattr__ and __init__,
+        # so only use them when the class does not override those.
+        self.plain = all(getattr(cls, name) is getattr(JsonDict, name)
+                         for name in ('update', '__setattr__', '_decode'))
+
+        # Defaults decoded once.  Each new instance gets a copy in which
+        # immutable values are shared and only nested JsonDicts and lists
+        # are copied, which is much cheaper than decoding again.
+        self.template = None
+        if default is not None and self.plain:
+            template = JsonDict.__new__(JsonDict)
+            template._default = default
+            template.update(default)
+            self.template = template
+
+    def current(self, cls):
+        """Return True if no class has reassigned `_default` since."""
+        mro = cls.__mro__
+        for i, source in zip(self.positions, self.sources):
+            if mro[i].__dict__.get('_default') is not source:
+                return False
+        return True
+
+    @classmethod
+    def get(cls, jsondict_cls):
+        defaults = _class_defaults.get(jsondict_cls)
+        if defaults is None or not defaults.current(jsondict_cls):
+            defaults = _class_defaults[jsondict_cls] = cls(jsondict_cls)
+        return defaults
+
+
+# _ClassDefaults of each JsonDict subclass, which does not keep classes
+# created at run time alive
+_class_defaults = weakref.WeakKeyDictionary()
+
+
+def _copy_default(value):
+    """Copy a decoded default value, sharing everything but containers."""
+    if isinstance(value, JsonDict):
+        new = JsonDict.__new__(value.__class__)
+        if value._default is not None:
+            new._default = value._default
+        for k, v in value.items():
+            dict.__setitem__(new, k, _copy_default(v))
+        return new
+    elif isinstance(value, list):
+        return [_copy_default(v) for v in value]
+    return value
 
 
 class JsonDict(dict):
@@ -58,23 +148,28 @@ class JsonDict(dict):
         """
         super(JsonDict, self).__init__()
         if default:
-            self._default = default
+            plain = False
+        else:
+            defaults = _ClassDefaults.get(self.__class__)
+            default, plain = defaults.default, defaults.plain
+
+        if default is None:
+            # No defaults to apply or validate against.  _default is left
+            # to the class attribute so that no instance __dict__ is
+            # allocated.
+            if plain:
+                self._fast_update(dict)
+            else:
+                self.update(dict)
         else:
-            default = None
-            for c in reversed(inspect.getmro(self.__class__)):
-                try:
-                    cd = c._default
-                except:
-                    continue
-                if cd is not None:
-                    if default is None:
-                        default = {}
-                    for key, value in cd.items():
-                        default[key] = value
             self._default = default
-
-        self.update(self._default)
-        self.update(dict)
+            if plain:
+                setitem = super(JsonDict, self).__setitem__
+                for k, v in defaults.template.items():
+                    setitem(k, _copy_default(v))
+            else:
+                self.update(default)
+            self.update(dict)
         self.update(kwargs)
 
         if self._required is not None:
@@ -109,6 +204,22 @@ class JsonDict(dict):
             for k, v in dict.items():
                 self.__setattr__(k, v)
 
+    def _fast_update(self, dict):
+        """Update the object from a dict, for use when there is no
+        `_default`.  Plain keys are stored directly, keys needing the
+        special handling of __setattr__ go through it."""
+        if dict is None:
+            return
+        setitem = super(JsonDict, self).__setitem__
+        for k, v in dict.items():
+            if (k.__class__ is str and k and k[0] != '_' and
+                    '__' not in k):
+                if isinstance(v, _decoded_types):
+                    v = self._decode(v, None)
+                setitem(k, v)
+            else:
+                self.__setattr__(k, v)
+
     def __getattr__(self, key):
         """
         Return the value associated with the specified key.  Keys starting
@@ -211,11 +322,16 @@ class JsonDict(dict):
         JsonDict."""
         # print "decode(%s, %s)" % (value, default)
         if isinstance(value, dict):
-            newvalue = JsonDict(dict=value, default=default)
+            if default is None:
+                # same as JsonDict(dict=value), without the __init__ overhead
+                newvalue = JsonDict.__new__(JsonDict)
+                newvalue._fast_update(value)
+            else:
+                newvalue = JsonDict(dict=value, default=default)
         elif isinstance(value, list):
-            newvalue = []
-            for item in value:
-                newvalue.append(self._decode(item, None))
+            decode = self._decode
+            newvalue = [decode(item, None) if isinstance(item, _decoded_types)
+                        else item for item in value]
         else:
             if isinstance(value, bytes):
                 newvalue = value.decode('utf-8')
@@ -225,6 +341,114 @@ class JsonDict(dict):
         return newvalue
 
 
+class LazyJsonDict(JsonDict):
+    """
+    A JsonDict view of parsed JSON data that wraps nested values only
+    when they are accessed.
+
+    JsonDict converts every nested dict into a JsonDict up front, which
+    is slow and memory hungry for large API responses of which only a
+    few fields are used.  LazyJsonDict copies just the top-level keys;
+    a nested dict is converted to a LazyJsonDict (and a nested list to a
+    lazily wrapping list) the first time it is read, and the converted
+    value replaces the original so the work is done only once:
+
+      >>> d = LazyJsonDict.loads(response_text)
+      >>> d.rows[10000].name
+
+    Keys are stored as given, `_default` and `_required` are not
+    supported, and values from `items()` and `values()` are wrapped as
+    they are produced.
+    """
+
+    def __init__(self, dict=None, **kwargs):
+        super(JsonDict, self).__init__()
+        self.update(dict)
+        self.update(kwargs)
+
+    def update(self, dict):
+        """Update the object from a dict, without converting values."""
+        if dict is not None:
+            super(JsonDict, self).update(dict)
+
+    def __getitem__(self, key):
+        value = super(LazyJsonDict, self).__getitem__(key)
+        new = _LazyList._convert(value)
+        if new is not value:
+            super(LazyJsonDict, self).__setitem__(key, new)
+        return new
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def values(self):
+        return [self[k] for k in self.keys()]
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+
+class _LazyList(list):
+    """List that converts its items on first access.
+
+    Reading, iterating, comparing and searching the list see converted
+    items.  Methods not overridden here, such as sort() and copy(), see
+    the items as stored.
+    """
+
+    @staticmethod
+    def _convert(value):
+        if isinstance(value, dict) and not isinstance(value, JsonDict):
+            return LazyJsonDict(value)
+        if isinstance(value, list) and not isinstance(value, _LazyList):
+            return _LazyList(value)
+        return value
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        value = super(_LazyList, self).__getitem__(index)
+        new = self._convert(value)
+        if new is not value:
+            super(_LazyList, self).__setitem__(index, new)
+        return new
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __reversed__(self):
+        for i in range(len(self) - 1, -1, -1):
+            yield self[i]
+
+    def __eq__(self, other):
+        return list(self) == other
+
+    def __ne__(self, other):
+        return list(self) != other
+
+    def __contains__(self, value):
+        return any(item is value or item == value for item in self)
+
+    def pop(self, index=-1):
+        return self._convert(super(_LazyList, self).pop(index))
+
+    def index(self, value, start=0, stop=sys.maxsize):
+        for i in range(*slice(start, stop).indices(len(self))):
+            item = self[i]
+            if item is value or item == value:
+                return i
+        raise ValueError('%r is not in list' % (value,))
+
+    def count(self, value):
+        return sum(1 for item in self if item is value or item == value)
+
+    def remove(self, value):
+        del self[self.index(value)]
+
+
 class DictObject(dict):
     """
     Creates an object from a custom dictionary, setting attributes
@@ -263,16 +487,47 @@ class DictObject(dict):
     # AttributeError then 'hasattr' returns False else it returns True.
 
     @staticmethod
-    def create_from_dict(data):
+    def create_from_dict(data, lazy=False, from_json=False):
         """Convert a dictionary into a DictObject instance.
 
         In the process, this converts all unicode strings to regular strings.
+
+        `lazy` when True converts only the top-level dictionary.  Nested
+            dicts and lists are converted the first time they are
+            accessed, and the converted value is kept for later accesses.
+
+        `from_json` when True skips the checks for byte strings, which
+            json.loads never produces.
         """
 
         if data is None:
             # if we aren't given a dict, just return an empty object
             return DictObject()
 
+        if lazy:
+            if from_json:
+                return _LazyDictObject(data)
+            return _LazyDictObject((_decode_bytes(k), v)
+                                   for k, v in data.items())
+
+        if from_json:
+            def _convert_list(data):
+                return [_convert_dict(item) if isinstance(item, dict) else
+                        _convert_list(item) if isinstance(item, list) else
+                        item for item in data]
+
+            def _convert_dict(data):
+                rv = DictObject()
+                for key, value in data.items():
+                    if isinstance(value, dict):
+                        value = _convert_dict(value)
+                    elif isinstance(value, list):
+                        value = _convert_list(value)
+                    rv[key] = value
+                return rv
+
+            return _convert_dict(data)
+
         def _decode_list(data):
             rv = []
             for item in data:
@@ -320,6 +575,395 @@ class DictObject(dict):
         self[key] = value
 
 
+def _decode_bytes(value):
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return value
+
+
+class _LazyDictObject(DictObject):
+    """DictObject that converts nested values on first access."""
+
+    def __getitem__(self, key):
+        value = super(_LazyDictObject, self).__getitem__(key)
+        new = _LazyDictObjectList._convert(value)
+        if new is not value:
+            super(_LazyDictObject, self).__setitem__(key, new)
+        return new
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def values(self):
+        return [self[k] for k in self.keys()]
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def __eq__(self, other):
+        # compare converted values, stored ones may still be bytes
+        return dict(self.items()) == other
+
+    def __ne__(self, other):
+        return dict(self.items()) != other
+
+
+class _LazyDictObjectList(_LazyList):
+    """List that converts its items to DictObjects on first access."""
+
+    @staticmethod
+    def _convert(value):
+        if isinstance(value, bytes):
+            return value.decode('utf-8')
+        if isinstance(value, dict) and not isinstance(value, DictObject):
+            return _LazyDictObject((_decode_bytes(k), v)
+                                   for k, v in value.items())
+        if isinstance(value, list) and not isinstance(value, _LazyList):
+            return _LazyDictObjectList(value)
+        return value
+
+
+def _column_buffer(values):
+    """Return `values` as the most compact buffer that holds them.
+
+    Integers that fit in 64 bits are stored in an array('q'), floats
+    (optionally mixed with integers) in an array('d'), and anything else
+    in a plain list.
+    """
+    values = list(values)
+    if not values:
+        return values
+    kinds = set(v.__class__ for v in values)
+    if kinds == set([int]):
+        try:
+            return array('q', values)
+        except OverflowError:
+            return values
+    if kinds == set([float]) or kinds == set([int, float]):
+        return array('d', values)
+    return values
+
+
+def _take(column, indices):
+    """Return the items of `column` at `indices`, in the same kind of
+    buffer."""
+    if isinstance(column, array):
+        if numpy is not None and len(indices) > 1000:
+            view = numpy.frombuffer(column, dtype=column.typecode)
+            taken = view[numpy.asarray(indices, dtype='intp')]
+            result = array(column.typecode)
+            result.frombytes(taken.tobytes())
+            return result
+        return array(column.typecode, [column[i] for i in indices])
+    return [column[i] for i in indices]
+
+
+class ResultTable(object):
+    """Column oriented table of results.
+
+    Appliance APIs often return tables as a list of dicts or a list of
+    lists.  Holding a large table as one DictObject per row costs a
+    dict per row; a ResultTable instead keeps one buffer per column.
+    Integer and float columns are stored in `array.array` buffers, other
+    columns in lists:
+
+      >>> t = ResultTable.from_rows([{'host': 'a', 'bytes': 10},
+                                     {'host': 'b', 'bytes': 20}])
+      >>> t.column('bytes')
+      array('q', [10, 20])
+      >>> t[1].host
+      'b'
+      >>> t.filter(bytes=lambda b: b > 15).to_dicts()
+      [{'host': 'b', 'bytes': 20}]
+
+    Rows are returned as lightweight `ResultTable.Row` views that
+    support the same attribute and item access as a DictObject.
+    """
+
+    class Row(object):
+        """View of a single row of a ResultTable."""
+
+        __slots__ = ('_table', '_index')
+
+        def __init__(self, table, index):
+            object.__setattr__(self, '_table', table)
+            object.__setattr__(self, '_index', index)
+
+        def __dir__(self):
+            return list(self._table.columns)
+
+        def __getattr__(self, key):
+            try:
+                return self._table._columns[key][self._index]
+            except KeyError:
+                raise AttributeError(key)
+
+        def __setattr__(self, key, value):
+            raise AttributeError('ResultTable rows are read-only')
+
+        def __getitem__(self, key):
+            if isinstance(key, int):
+                key = self._table.columns[key]
+            return self._table._columns[key][self._index]
+
+        def __contains__(self, key):
+            return key in self._table._columns
+
+        def __iter__(self):
+            return iter(self._table.columns)
+
+        def __len__(self):
+            return len(self._table.columns)
+
+        def __eq__(self, other):
+            if isinstance(other, ResultTable.Row):
+                other = other.to_dict()
+            return self.to_dict() == other
+
+        def __ne__(self, other):
+            return not self == other
+
+        def __repr__(self):
+            return '<Row %r>' % self.to_dict()
+
+        def keys(self):
+            return list(self._table.columns)
+
+        def values(self):
+            return [self._table._columns[k][self._index]
+                    for k in self._table.columns]
+
+        def items(self):
+            return list(zip(self.keys(), self.values()))
+
+        def get(self, key, default=None):
+            if key in self._table._columns:
+                return self[key]
+            return default
+
+        def to_dict(self):
+            """Return the row as a DictObject."""
+            return DictObject(self.items())
+
+    def __init__(self, columns, data=None):
+        """Create a table.
+
+        `columns` is the list of column names.
+
+        `data` optionally maps each column name to a sequence of values;
+            all sequences must be the same length.  Values that are
+            already an array.array are used without copying.
+        """
+        self.columns = list(columns)
+        self._columns = {}
+        length = None
+        for name in self.columns:
+            values = (data or {}).get(name, [])
+            if not isinstance(values, array):
+                values = _column_buffer(values)
+            if length is None:
+                length = len(values)
+            elif len(values) != length:
+                raise ValueError('column %s has %d values, expected %d'
+                                 % (name, len(values), length))
+            self._columns[name] = values
+        self._length = length or 0
+
+    @classmethod
+    def from_rows(cls, rows, columns=None):
+        """Create a table from a sequence of rows.
+
+        `rows` is a sequence of dicts, or of lists with one value per
+            column.
+
+        `columns` is the list of column names.  It is required when
+            the rows are lists; for dicts it defaults to the keys of
+            the first row, and missing keys are filled with None.
+            Without rows, the table has these columns or none.
+        """
+        rows = list(rows)
+        if not rows:
+            return cls(columns or [])
+        if isinstance(rows[0], dict):
+            if columns is None:
+                columns = list(rows[0].keys())
+            data = dict((name, [row.get(name) for row in rows])
+                        for name in columns)
+        else:
+            if columns is None:
+                raise ValueError('columns must be given for list rows')
+            data = dict((name, list(values))
+                        for name, values in zip(columns, zip(*rows)))
+        return cls(columns, data)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        for i in range(self._length):
+            yield self.Row(self, i)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(range(*index.indices(self._length)))
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('row index out of range')
+        return self.Row(self, index)
+
+    def __repr__(self):
+        return '<%s %d rows, columns %s>' % (self.__class__.__name__,
+                                             self._length, self.columns)
+
+    def column(self, name):
+        """Return the buffer holding column `name`."""
+        return self._columns[name]
+
+    def array(self, name):
+        """Return column `name` as a NumPy array.
+
+        Integer and float columns share memory with the table, so the
+        conversion does not copy.  Rows appended to the table later are
+        not seen by the array.  Requires NumPy.
+        """
+        if numpy is None:
+            raise ImportError('numpy is required for ResultTable.array')
+        values = self._columns[name]
+        if isinstance(values, array):
+            return numpy.frombuffer(values, dtype=values.typecode)
+        return numpy.array(values, dtype=object)
+
+    def append(self, row):
+        """Append a row, given as a dict or a list of values."""
+        if isinstance(row, dict):
+            row = [row.get(name) for name in self.columns]
+        if len(row) != len(self.columns):
+            raise ValueError('expected %d values, got %d'
+                             % (len(self.columns), len(row)))
+        # convert every column before changing any of them, so that an
+        # error leaves the table unchanged
+        updates = []
+        for name, value in zip(self.columns, row):
+            values = self._columns[name]
+            if not self._length and not isinstance(values, array):
+                # the first row picks the kind of buffer, as in from_rows
+                typed = _column_buffer([value])
+                if isinstance(typed, array):
+                    values, value = array(typed.typecode), typed
+            elif isinstance(values, array):
+                try:
+                    value = array(values.typecode, (value,))
+                except (TypeError, OverflowError):
+                    values = values.tolist()
+            updates.append((name, values, value))
+
+        for name, values, value in updates:
+            if isinstance(values, array):
+                try:
+                    values.extend(value)
+                except BufferError:
+                    # the buffer is in use, such as by a NumPy array
+                    # from array(), so extend a copy instead
+                    values = array(values.typecode, values)
+                    values.extend(value)
+            else:
+                values.append(value)
+            self._columns[name] = values
+        self._length += 1
+
+    def take(self, indices):
+        """Return a new table with the rows at `indices`, in order."""
+        return self.__class__(self.columns,
+                              dict((name, _take(values, indices))
+                                   for name, values in
+                                   self._columns.items()))
+
+    def filter(self, mask=None, **conditions):
+        """Return a new table with the rows that match.
+
+        `mask` is an optional sequence of booleans, one per row, such as
+            a NumPy comparison of `array()` results.
+
+        Each keyword argument names a column, and is either a value the
+            column must equal or a callable returning True for the
+            values to keep.
+        """
+        if mask is not None:
+            if len(mask) != self._length:
+                raise ValueError('mask has %d values, expected %d'
+                                 % (len(mask), self._length))
+            indices = [i for i, keep in enumerate(mask) if keep]
+        else:
+            indices = range(self._length)
+
+        for name, test in conditions.items():
+            values = self._columns[name]
+            if callable(test):
+                indices = [i for i in indices if test(values[i])]
+            else:
+                indices = [i for i in indices if values[i] == test]
+        return self.take(list(indices))
+
+    def sort(self, *by, **kwargs):
+        """Return a new table sorted by one or more columns.
+
+        None sorts before any other value.
+
+        `reverse` keyword, when True, sorts in descending order.
+        """
+        reverse = kwargs.pop('reverse', False)
+        if kwargs:
+            raise TypeError('unexpected arguments: %s' % ', '.join(kwargs))
+        columns = [self._columns[name] for name in by]
+        if (numpy is not None and not reverse and
+                all(isinstance(c, array) for c in columns)):
+            # lexsort is stable and sorts by the last key first
+            keys = [numpy.frombuffer(c, dtype=c.typecode)
+                    for c in reversed(columns)]
+            return self.take(numpy.lexsort(keys).tolist())
+
+        # pair each value with whether it is None, so that None is
+        # never compared with other values
+        if len(columns) == 1:
+            column = columns[0]
+
+            def key(i):
+                value = column[i]
+                return value is not None, value
+        else:
+            def key(i):
+                return tuple((c[i] is not None, c[i]) for c in columns)
+        indices = sorted(range(self._length), key=key, reverse=reverse)
+        return self.take(indices)
+
+    def group_by(self, name):
+        """Split the table into a dict of tables keyed by the values of
+        column `name`, in order of first appearance."""
+        groups = {}
+        for i, value in enumerate(self._columns[name]):
+            groups.setdefault(value, []).append(i)
+        return dict((value, self.take(indices))
+                    for value, indices in groups.items())
+
+    def to_dicts(self):
+        """Return the rows as a list of DictObjects."""
+        return [row.to_dict() for row in self]
+
+    def to_pandas(self):
+        """Return the table as a pandas DataFrame.
+
+        Integer and float columns are handed to pandas as NumPy views of
+        the column buffers, so pandas can use them without copying.
+        Requires pandas.
+        """
+        import pandas
+        data = dict((name, self.array(name)) for name in self.columns)
+        return pandas.DataFrame(data, columns=self.columns, copy=False)
+
+
 class ColumnProxy(object):
     """ a class to simplify creating a data structure that mirrors
     a structure that can be fetched at run-time from a server.
@@ -4,8 +4,35 @@
 # accompanying the software ("License").  This software is distributed "AS IS"
 # as set forth in the License.
 
+import io
+import sys
+import csv
+import gzip
+import functools
+import itertools
+from array import array
 
 
+_symbols = ('B', 'K', 'M', 'G', 'T', 'P', 'E', 'Z', 'Y')
+
+# bytes per unit, by symbol and by power of 1024
+_prefix = dict((symbol, 1 << i * 10) for i, symbol in enumerate(_symbols))
+_sizes = [_prefix[symbol] for symbol in _symbols]
+_largest = len(_symbols) - 1
+
+_default_fmt = "%(value)i%(symbol)s"
+
+
+def _unit(n):
+    """Return the index of the largest unit not greater than `n`."""
+    if isinstance(n, int):
+        if n < 1024:
+            return 0
+        return min((n.bit_length() - 1) // 10, _largest)
+    for i in range(_largest, 0, -1):
+        if n >= _sizes[i]:
+            return i
+    return 0
 
 
 # http://goo.gl/zeJZl
@@ -17,19 +44,37 @@ def bytes2human(n, fmt=None):
     '95M'
     """
     if fmt is None:
-        fmt = "%(value)i%(symbol)s"
-    symbols = ('B', 'K', 'M', 'G', 'T', 'P', 'E', 'Z', 'Y')
-    prefix = {}
-    for i, s in enumerate(symbols[1:]):
-        prefix[s] = 1 << (i + 1) * 10
-    for symbol in reversed(symbols[1:]):
-        if n >= prefix[symbol]:
-            value = float(n) / prefix[symbol]
-            return fmt % locals()
-    return fmt % dict(symbol=symbols[0], value=n)
+        fmt = _default_fmt
+    i = _unit(n)
+    if i:
+        return fmt % {'n': n, 'value': float(n) / _sizes[i],
+                      'symbol': _symbols[i]}
+    return fmt % {'n': n, 'value': n, 'symbol': _symbols[0]}
+
+
+def bytes2human_column(values, fmt=None):
+    """Return a list with `bytes2human` applied to each of `values`.
+
+    `values` is any iterable of numbers, such as a column of a
+    ResultTable.  With the default `fmt` the strings are built without
+    the per-value dict of `bytes2human`.
+    """
+    if fmt is not None:
+        return [bytes2human(n, fmt) for n in values]
+
+    result = []
+    append = result.append
+    for n in values:
+        i = _unit(n)
+        if i:
+            append('%d%s' % (n / _sizes[i], _symbols[i]))
+        else:
+            append('%dB' % n)
+    return result
 
 
 # http://goo.gl/zeJZl
+@functools.lru_cache(maxsize=1024)
 def human2bytes(s):
     """
     >>> human2bytes('1M')
@@ -37,7 +82,6 @@ def human2bytes(s):
     >>> human2bytes('1G')
     1073741824
     """
-    symbols = ('B', 'K', 'M', 'G', 'T', 'P', 'E', 'Z', 'Y')
     s = s.replace(' ', '')
     offset = 0
     num = ''
@@ -52,25 +96,35 @@ def human2bytes(s):
 
     if offset:
         num = str(int(float(num) * 1024))
-        letter = symbols[symbols.index(letter) - 1]
-    assert num.isdigit() and letter in symbols
-    num = float(num)
-    prefix = {symbols[0]: 1}
-    for i, s in enumerate(symbols[1:]):
-        prefix[s] = 1 << (i + 1) * 10
-    return int(num * prefix[letter])
+        letter = _symbols[_symbols.index(letter) - 1]
+    assert num.isdigit() and letter in _prefix
+    return int(float(num) * _prefix[letter])
+
+
+def human2bytes_column(values):
+    """Return `human2bytes` applied to each of `values`.
+
+    The result is an array.array of integers, or a list if a value is
+    too large for a 64 bit integer.  Repeated strings are parsed once.
+    """
+    result = [human2bytes(s) for s in values]
+    try:
+        return array('q', result)
+    except OverflowError:
+        return result
 
 
 class Formatter(object):
     """ Helper class to format output into tables with headers
 
-        get_csv and print_csv use simple formatting rules, for
-        more complex usage, including dialects, the built-in
-        `csv` module may be more suitable.
+        get_csv uses simple formatting rules, for more complex
+        usage, including quoting and dialects, use write_csv or
+        the built-in `csv` module.
     """
     @classmethod
     def print_table(cls, data, headers, paginate=None, padding=4,
-                    max_width=None, long_column=1, wrap_columns=False):
+                    max_width=None, long_column=1, wrap_columns=False,
+                    stream=None):
         """ Print formatted table with optional pagination
 
             `data`         - list of data rows
@@ -81,30 +135,84 @@ class Formatter(object):
             `long_column`  - column number to either truncate or wrap to meet
                              max_width (defaults to second column)
             `wrap_columns` - indicate whether to wrap or truncate long_column
-        """
-        import textwrap
+            `stream`       - file to write to, defaults to sys.stdout
 
+            All of `data` is read to size the columns before anything is
+            printed, see `print_table_stream` for large or incremental
+            data.
+        """
+        data = list(data)
         widths = [max(len(str(x)) + padding for x in col)
                   for col in zip(headers, *data)]
+        cls._write_table(data, headers, widths, paginate, padding,
+                         max_width, long_column, wrap_columns, stream)
+
+    @classmethod
+    def print_table_stream(cls, rows, headers, widths=None, sample=100,
+                           paginate=None, padding=4, max_width=None,
+                           long_column=1, wrap_columns=False, stream=None):
+        """ Print formatted table while reading rows from an iterator
+
+            Rows are printed as they arrive, so output starts
+            immediately and memory use does not grow with the table.
+            Values wider than their column are printed in full, so
+            some rows may not line up.
+
+            `rows`         - iterable of data rows, such as a generator
+            `widths`       - list of column widths, not including
+                             padding.  By default the widths are computed
+                             from the headers and the first `sample` rows.
+            `sample`       - number of rows read to compute widths
+
+            The other arguments are as for `print_table`.
+        """
+        rows = iter(rows)
+        if widths is None:
+            first = list(itertools.islice(rows, sample))
+            widths = [max(len(str(x)) for x in col)
+                      for col in zip(headers, *first)]
+            rows = itertools.chain(first, rows)
+        widths = [w + padding for w in widths]
+        cls._write_table(rows, headers, widths, paginate, padding,
+                         max_width, long_column, wrap_columns, stream)
+
+    @classmethod
+    def _write_table(cls, rows, headers, widths, paginate, padding,
+                     max_width, long_column, wrap_columns, stream):
+        write = (stream or sys.stdout).write
+        for line in cls._table_lines(rows, headers, widths, paginate,
+                                     padding, max_width, long_column,
+                                     wrap_columns):
+            write(line + '\n')
+
+    @classmethod
+    def _table_lines(cls, rows, headers, widths, paginate, padding,
+                     max_width, long_column, wrap_columns):
+        """Generate the lines of a table, without line endings."""
+        import textwrap
 
         if max_width and sum(widths) > max_width:
             delta = sum(widths) - max_width
             if delta > widths[long_column]:
                 # issue warning then turn off wrapping so data is still printed
-                print(('WARNING: Formatting error: cannot truncate column %d '
+                yield ('WARNING: Formatting error: cannot truncate column %d '
                        'to meet max_width %d, printing all data instead ...'
-                       % (long_column, max_width)))
+                       % (long_column, max_width))
                 max_width = None
             else:
+                widths = list(widths)
                 widths[long_column] -= delta
 
+        def format_row(row):
+            return ''.join(str(s).ljust(x) for s, x in zip(row, widths))
+
         header = ''.join(s.ljust(x) for s, x in zip(headers, widths))
-        for i, row in enumerate(data):
+        for i, row in enumerate(rows):
             if i == 0 or (paginate and i % paginate == 0):
                 # print header at least once
-                print('')
-                print(header)
-                print('-' * len(header))
+                yield ''
+                yield header
+                yield '-' * len(header)
             if max_width:
                 row = list(row)
                 column = row[long_column]
@@ -113,8 +221,7 @@ class Formatter(object):
                     # truncate data with ellipsis if needed
                     row[long_column] = ((column[:width] + '..')
                                         if len(column) > width else column)
-                    print(''.join(str(s).ljust(x)
-                                  for s, x in zip(row, widths)))
+                    yield format_row(row)
                 else:
                     # take column and wrap it in place, creating new rows
                     wrapped = (r for r in textwrap.wrap(column, width=width))
@@ -123,16 +230,13 @@ class Formatter(object):
                     except StopIteration:
                         # The column is empty string
                         pass
-                    print(''.join(str(s).ljust(x)
-                                  for s, x in zip(row, widths)))
+                    yield format_row(row)
                     for line in wrapped:
                         newrow = [''] * len(widths)
                         newrow[long_column] = line
-                        print(''.join(str(s).ljust(x)
-                                      for s, x in zip(newrow, widths)))
+                        yield format_row(newrow)
             else:
-                print(''.join(str(s).ljust(x)
-                              for s, x in zip(row, widths)))
+                yield format_row(row)
 
     @classmethod
     def get_csv(cls, data, headers, delim=','):
@@ -148,5 +252,55 @@ class Formatter(object):
     @classmethod
     def print_csv(cls, data, headers, delim=','):
         """ Print table to stdout using `delim` as separator
+
+            Rows are written one at a time, see `write_csv`.
         """
-        print('\n'.join(cls.get_csv(data, headers, delim)))
+        cls.write_csv(data, headers, delim=delim, lineterminator='\n')
+
+    @classmethod
+    def write_csv(cls, rows, headers, dest=None, delim=',', compress=None,
+                  lineterminator='\r\n'):
+        """ Write rows in CSV format (RFC 4180) as they are read
+
+            `rows`           - iterable of data rows, such as a generator
+            `headers`        - list of strings for the header row, or None
+            `dest`           - file name or file object to write to,
+                               defaults to sys.stdout
+            `delim`          - field separator
+            `compress`       - gzip the output, defaults to True for file
+                               names ending in '.gz'
+            `lineterminator` - line ending, RFC 4180 uses '\\r\\n'
+
+            Fields that contain the separator, quotes or line breaks are
+            quoted, and None is written as an empty field.
+        """
+        if dest is None:
+            dest = sys.stdout
+
+        if isinstance(dest, str):
+            if compress is None:
+                compress = dest.endswith('.gz')
+            if compress:
+                f = gzip.open(dest, 'wt', newline='')
+            else:
+                f = open(dest, 'w', newline='')
+        elif compress:
+            # compress into the underlying binary file of text streams
+            if hasattr(dest, 'buffer'):
+                dest.flush()
+                dest = dest.buffer
+            f = io.TextIOWrapper(gzip.GzipFile(fileobj=dest, mode='wb'),
+                                 newline='')
+        else:
+            f = None
+
+        try:
+            writer = csv.writer(f or dest, delimiter=delim,
+                                lineterminator=lineterminator)
+            if headers:
+                writer.writerow(headers)
+            writer.writerows(rows)
+        finally:
+            # for file objects this only closes the gzip stream
+            if f is not None:
+                f.close()
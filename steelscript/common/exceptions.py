@@ -9,7 +9,7 @@ import json
 import xml.etree.ElementTree as ElementTree
 
 __all__ = ['RvbdException', 'RvbdHTTPException',
-           'RvbdConnectException']
+           'RvbdConnectException', 'RvbdTimeoutException']
 
 
 class RvbdException(Exception):
@@ -37,6 +37,10 @@ class RvbdConnectException(RvbdException):
         self.errname = kwargs.get('errname', None)
 
 
+class RvbdTimeoutException(RvbdException):
+    pass
+
+
 class RvbdHTTPException(RvbdException):
     def __init__(self, result, data, method, urlpath):
         super().__init__('HTTP {0} on {1} returned status {2} ({3})'
@@ -0,0 +1,364 @@
+# Copyright (c) 2019 Riverbed Technology, Inc.
+#
+# This software is licensed under the terms and conditions of the MIT License
+# accompanying the software ("License").  This software is distributed "AS IS"
+# as set forth in the License.
+
+"""
+Write tables of results to files for use by other tools.
+
+Besides CSV, tables can be written in the columnar Arrow IPC, Feather
+and Parquet formats when pyarrow is installed.  Without pyarrow the
+'columns' format is available, which stores integer and float columns
+as raw `array.array` buffers:
+
+    >>> write_table(rows, 'results.parquet', headers=['host', 'bytes'])
+    >>> table = read_table('results.parquet')
+
+Rows are read and written in batches of `batch_size` rows, so large
+results do not need to be held in memory at once.  The Arrow formats
+convert every batch before writing unless a `schema` is given.
+"""
+
+import os
+import sys
+import json
+import struct
+import itertools
+from array import array
+
+from steelscript.common.datautils import Formatter
+from steelscript.common.datastructures import ResultTable
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+__all__ = ['FORMATS', 'ARROW_FORMATS', 'available_formats', 'guess_format',
+           'write_table', 'read_table']
+
+
+#: formats supported by write_table
+FORMATS = ('csv', 'arrow', 'feather', 'parquet', 'columns')
+
+#: formats that require pyarrow
+ARROW_FORMATS = ('arrow', 'feather', 'parquet')
+
+_extensions = {'.csv': 'csv',
+               '.arrow': 'arrow',
+               '.ipc': 'arrow',
+               '.feather': 'feather',
+               '.parquet': 'parquet',
+               '.cols': 'columns'}
+
+# header of files in the 'columns' format, which is followed by blocks
+# of a JSON description and the column data
+_COLUMNS_MAGIC = b'SSCOLS1\n'
+_block_header = struct.Struct('<I')
+
+
+def available_formats():
+    """Return the formats that can be written with the installed
+    packages."""
+    if pyarrow is None:
+        return tuple(f for f in FORMATS if f not in ARROW_FORMATS)
+    return FORMATS
+
+
+def guess_format(filename):
+    """Return the format for `filename` based on its extension.
+
+    Names such as 'results.csv.gz' are compressed CSV.  Raises
+    ValueError for other extensions.
+    """
+    name = filename[:-3] if filename.endswith('.gz') else filename
+    ext = os.path.splitext(name)[1].lower()
+    try:
+        return _extensions[ext]
+    except KeyError:
+        raise ValueError('cannot tell the format of %s from its extension, '
+                         'expected one of %s'
+                         % (filename, ', '.join(sorted(_extensions))))
+
+
+def _batches(data, headers, batch_size):
+    """Yield ResultTables of at most `batch_size` rows, at least one."""
+    if isinstance(data, ResultTable):
+        yield data
+        return
+
+    rows = iter(data)
+    empty = True
+    while True:
+        chunk = list(itertools.islice(rows, batch_size))
+        if not chunk and not empty:
+            return
+        empty = False
+        if chunk:
+            table = ResultTable.from_rows(chunk, columns=headers)
+        else:
+            table = ResultTable(headers or [])
+        # later batches use the columns of the first
+        headers = table.columns
+        yield table
+        if len(chunk) < batch_size:
+            return
+
+
+def write_table(data, dest, format=None, headers=None, batch_size=65536,
+                compression=None, schema=None):
+    """Write a table of results to a file.
+
+    `data` is a ResultTable, or an iterable of rows as dicts or lists
+        of values.
+
+    `dest` is a file name or a file object.  CSV is written to text
+        files, all other formats to binary files.
+
+    `format` is one of FORMATS, by default chosen from the extension
+        of `dest` with `guess_format`.
+
+    `headers` is the list of column names.  It is required for rows
+        given as lists, and is taken from the ResultTable or the keys
+        of the first dict otherwise.
+
+    `batch_size` is the number of rows converted to columns at a time.
+
+    `compression` is passed on to the writer: a codec such as 'zstd'
+        for the Arrow formats, or True to gzip CSV.
+
+    `schema` is a pyarrow.Schema for the Arrow formats.  With a schema,
+        batches are converted and written one at a time.  Without one,
+        all batches are converted before writing so that the column
+        types can be inferred from every row, e.g. floats in a column
+        that starts with ints.
+
+    Returns the number of rows written.
+    """
+    if format is None:
+        if isinstance(dest, str):
+            format = guess_format(dest)
+        else:
+            format = 'columns' if pyarrow is None else 'arrow'
+    if format not in FORMATS:
+        raise ValueError('unknown format %r, expected one of %s'
+                         % (format, ', '.join(FORMATS)))
+    if format in ARROW_FORMATS and pyarrow is None:
+        raise ImportError('pyarrow is required for %s output' % format)
+
+    if format == 'csv':
+        if isinstance(data, ResultTable):
+            headers = data.columns
+            rows = (row.values() for row in data)
+        else:
+            rows = iter(data)
+            first = next(rows, None)
+            if first is None:
+                Formatter.write_csv([], headers, dest=dest,
+                                    compress=compression)
+                return 0
+            rows = itertools.chain([first], rows)
+            if isinstance(first, dict):
+                if headers is None:
+                    headers = list(first.keys())
+                rows = ([row.get(h) for h in headers] for row in rows)
+        counted = _Counter()
+        Formatter.write_csv(counted(rows), headers, dest=dest,
+                            compress=compression)
+        return counted.count
+
+    batches = _batches(data, headers, batch_size)
+    if format == 'columns':
+        return _write_columns(batches, dest)
+    return _write_arrow(batches, dest, format, compression, schema)
+
+
+class _Counter(object):
+    """Count the items of an iterable as they are read."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, items):
+        for item in items:
+            self.count += 1
+            yield item
+
+
+def _arrow_array(values, type=None):
+    if numpy is not None and isinstance(values, array):
+        values = numpy.frombuffer(values, dtype=values.typecode)
+    else:
+        values = list(values)
+    return pyarrow.array(values, type=type)
+
+
+def _arrow_batch(table, schema=None):
+    """Convert a ResultTable to a RecordBatch, with the types of
+    `schema` or those inferred from its values."""
+    if schema is None:
+        return pyarrow.RecordBatch.from_arrays(
+            [_arrow_array(table.column(name)) for name in table.columns],
+            names=table.columns)
+    return pyarrow.RecordBatch.from_arrays(
+        [_arrow_array(table.column(name), field.type)
+         for name, field in zip(table.columns, schema)],
+        schema=schema)
+
+
+def _write_arrow(batches, dest, format, compression, schema=None):
+    if schema is None:
+        # a column of None or ints in the first batch may hold floats
+        # or strings later, so the types are known only once every
+        # batch has been converted
+        tables = [pyarrow.Table.from_batches([_arrow_batch(table)])
+                  for table in batches]
+        data = pyarrow.concat_tables(tables, promote_options='permissive')
+        schema = data.schema
+        batches = data.to_batches()
+    else:
+        batches = (_arrow_batch(table, schema) for table in batches)
+
+    if format == 'parquet':
+        from pyarrow import parquet
+        writer = parquet.ParquetWriter(dest, schema,
+                                       compression=compression or 'snappy')
+    else:
+        from pyarrow import ipc
+        if format == 'feather' and compression is None:
+            # Feather V2 is the Arrow IPC file format with compressed
+            # buffers
+            compression = 'lz4'
+        options = ipc.IpcWriteOptions(compression=compression)
+        writer = ipc.new_file(dest, schema, options=options)
+
+    count = 0
+    try:
+        for batch in batches:
+            if format == 'parquet':
+                writer.write_table(pyarrow.Table.from_batches([batch]))
+            else:
+                writer.write_batch(batch)
+            count += batch.num_rows
+    finally:
+        writer.close()
+    return count
+
+
+def _column_block(values):
+    """Return the description and data of one column of a block."""
+    if isinstance(values, array):
+        if sys.byteorder != 'little':
+            values = array(values.typecode, values)
+            values.byteswap()
+        return values.typecode, values.tobytes()
+    # values that JSON cannot represent, such as datetimes, are
+    # written as strings
+    return 'json', json.dumps(values, default=str).encode('utf-8')
+
+
+def _write_columns(batches, dest):
+    f = open(dest, 'wb') if isinstance(dest, str) else dest
+    count = 0
+    try:
+        f.write(_COLUMNS_MAGIC)
+        for table in batches:
+            columns = []
+            data = []
+            for name in table.columns:
+                kind, buf = _column_block(table.column(name))
+                columns.append({'name': name, 'type': kind,
+                                'size': len(buf)})
+                data.append(buf)
+            header = json.dumps({'rows': len(table),
+                                 'columns': columns}).encode('utf-8')
+            f.write(_block_header.pack(len(header)))
+            f.write(header)
+            for buf in data:
+                f.write(buf)
+            count += len(table)
+    finally:
+        if f is not dest:
+            f.close()
+    return count
+
+
+def _extend(column, values):
+    """Append `values` to a column buffer, returning the buffer."""
+    if (isinstance(column, array) and isinstance(values, array) and
+            column.typecode == values.typecode):
+        column.extend(values)
+        return column
+    if isinstance(column, array):
+        column = column.tolist()
+    column.extend(values)
+    return column
+
+
+def _read_columns(f):
+    if f.read(len(_COLUMNS_MAGIC)) != _COLUMNS_MAGIC:
+        raise ValueError('not a columns file')
+
+    names = None
+    data = {}
+    while True:
+        size = f.read(_block_header.size)
+        if not size:
+            break
+        header = json.loads(f.read(_block_header.unpack(size)[0]))
+        if names is None:
+            names = [c['name'] for c in header['columns']]
+        for c in header['columns']:
+            buf = f.read(c['size'])
+            if c['type'] == 'json':
+                values = json.loads(buf.decode('utf-8'))
+            else:
+                values = array(c['type'])
+                values.frombytes(buf)
+                if sys.byteorder != 'little':
+                    values.byteswap()
+            name = c['name']
+            data[name] = (_extend(data[name], values) if name in data
+                          else values)
+    return ResultTable(names or [], data)
+
+
+def read_table(source, format=None):
+    """Read a table written by `write_table` into a ResultTable.
+
+    `source` is a file name or a binary file object.
+
+    `format` is one of FORMATS other than 'csv', by default chosen from
+        the extension of `source`.
+    """
+    if format is None:
+        if isinstance(source, str):
+            format = guess_format(source)
+        else:
+            format = 'columns' if pyarrow is None else 'arrow'
+    if format == 'csv' or format not in FORMATS:
+        raise ValueError('cannot read %r tables' % format)
+
+    if format == 'columns':
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                return _read_columns(f)
+        return _read_columns(source)
+
+    if pyarrow is None:
+        raise ImportError('pyarrow is required for %s input' % format)
+    if format == 'parquet':
+        from pyarrow import parquet
+        table = parquet.read_table(source)
+    else:
+        from pyarrow import ipc
+        table = ipc.open_file(source).read_all()
+    return ResultTable(table.column_names,
+                       dict((name, table.column(name).to_pylist())
+                            for name in table.column_names))
@@ -0,0 +1,215 @@
+# Copyright (c) 2019 Riverbed Technology, Inc.
+#
+# This software is licensed under the terms and conditions of the MIT License
+# accompanying the software ("License").  This software is distributed "AS IS"
+# as set forth in the License.
+
+"""
+Concurrent reachability checks for a large number of appliances.
+
+`connection.test_tcp_conn` and `Service.ping` check a single host with
+blocking calls.  The functions here run the same checks -- TCP connect,
+TLS handshake and a GET of the common ping resource -- for many hosts
+at once on an asyncio event loop, with a global cap on the number of
+hosts being checked at the same time:
+
+    >>> results = sweep(['sh1.example.com', 'ar11.example.com:8443'])
+    >>> print_results(results)
+"""
+
+import ssl
+import time
+import socket
+import asyncio
+import logging
+
+from steelscript.common.datautils import Formatter
+
+__all__ = ['HealthCheckResult', 'check_host', 'sweep_async', 'sweep',
+           'print_results']
+
+logger = logging.getLogger(__name__)
+
+PING_PATH = '/api/common/1.0/ping'
+
+
+class HealthCheckResult(object):
+    """Outcome of the checks against one host.
+
+    Latencies are in seconds, and are None when the corresponding check
+    was not run or did not succeed.  `error` holds a description of the
+    first failure, if any.
+    """
+    headers = ['Host', 'Port', 'TCP (ms)', 'TLS (ms)', 'Ping (ms)',
+               'Status', 'Error']
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.tcp = None
+        self.tls = None
+        self.ping = None
+        self.status = None
+        self.error = None
+
+    def __repr__(self):
+        return '<%s %s:%s %s>' % (self.__class__.__name__, self.host,
+                                  self.port, 'ok' if self.ok else self.error)
+
+    @property
+    def reachable(self):
+        """True if the host accepted a TCP connection."""
+        return self.tcp is not None
+
+    @property
+    def ok(self):
+        """True if every check that was run succeeded."""
+        return self.error is None
+
+    def row(self):
+        def ms(v):
+            return '' if v is None else '%.1f' % (v * 1000)
+
+        return [self.host, self.port, ms(self.tcp), ms(self.tls),
+                ms(self.ping), self.status or '', self.error or '']
+
+
+def _split_host(host, port):
+    if isinstance(host, (tuple, list)):
+        return host[0], int(host[1])
+    if host.count(':') == 1:
+        host, p = host.split(':')
+        return host, int(p)
+    return host, port
+
+
+def _default_ssl_context():
+    # Appliances commonly run with self-signed certificates, match the
+    # Service default of verify_ssl=False
+    ctx = ssl.create_default_context()
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE
+    return ctx
+
+
+async def _close(writer):
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except (OSError, ssl.SSLError):
+        pass
+
+
+async def check_host(host, port=443, timeout=5, tls=True, ping=True,
+                     ssl_context=None):
+    """Check TCP reachability, TLS and ping for a single host.
+
+    `host` may be a hostname, a "host:port" string or a (host, port)
+    tuple, in which case `port` is ignored.
+
+    `timeout` is the number of seconds allowed for each step.
+
+    `tls` when False skips the handshake and pings over plain HTTP.
+
+    `ping` when False stops after the TCP (and TLS) checks.
+
+    Failures are recorded in the returned `HealthCheckResult` rather
+    than raised.
+    """
+    host, port = _split_host(host, port)
+    result = HealthCheckResult(host, port)
+
+    step = 'TCP connect'
+    try:
+        start = time.monotonic()
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port), timeout)
+        result.tcp = time.monotonic() - start
+        await _close(writer)
+
+        if not tls and not ping:
+            return result
+
+        if tls:
+            step = 'TLS handshake'
+            ctx = ssl_context or _default_ssl_context()
+            start = time.monotonic()
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=ctx,
+                                        server_hostname=host),
+                timeout)
+            result.tls = time.monotonic() - start
+        else:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port), timeout)
+
+        try:
+            if ping:
+                step = 'ping'
+                request = ('GET %s HTTP/1.1\r\n'
+                           'Host: %s\r\n'
+                           'Accept: application/json\r\n'
+                           'Connection: close\r\n\r\n' % (PING_PATH, host))
+                start = time.monotonic()
+                writer.write(request.encode('ascii'))
+                await writer.drain()
+                line = await asyncio.wait_for(reader.readline(), timeout)
+                result.ping = time.monotonic() - start
+
+                parts = line.decode('latin-1').split()
+                if len(parts) < 2 or not parts[1].isdigit():
+                    raise ValueError('invalid HTTP response %r' % line)
+                result.status = int(parts[1])
+                if result.status >= 400:
+                    result.error = 'ping returned status %d' % result.status
+        finally:
+            await _close(writer)
+
+    except asyncio.TimeoutError:
+        result.error = '%s timed out after %ss' % (step, timeout)
+    except (OSError, ssl.SSLError, ValueError, socket.gaierror) as e:
+        result.error = '%s failed: %s' % (step, e)
+
+    logger.debug('Health check %r' % result)
+    return result
+
+
+async def sweep_async(hosts, port=443, concurrency=200, timeout=5,
+                      tls=True, ping=True, ssl_context=None):
+    """Check all of `hosts` concurrently.
+
+    At most `concurrency` hosts are checked at the same time.  The other
+    arguments are as for `check_host`.  Returns a list of
+    `HealthCheckResult` objects in the same order as `hosts`.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    ctx = ssl_context or (_default_ssl_context() if tls else None)
+
+    async def check(host):
+        async with semaphore:
+            return await check_host(host, port=port, timeout=timeout,
+                                    tls=tls, ping=ping, ssl_context=ctx)
+
+    return await asyncio.gather(*[check(h) for h in hosts])
+
+
+def sweep(hosts, port=443, concurrency=200, timeout=5, tls=True, ping=True,
+          ssl_context=None):
+    """Blocking wrapper around `sweep_async`, for use outside of an
+    event loop."""
+    return asyncio.run(sweep_async(hosts, port=port, concurrency=concurrency,
+                                   timeout=timeout, tls=tls, ping=ping,
+                                   ssl_context=ssl_context))
+
+
+def print_results(results, sort=True):
+    """Print a reachability/latency table for a list of results.
+
+    With `sort`, unreachable hosts are listed first, then the slowest.
+    """
+    if sort:
+        results = sorted(results,
+                         key=lambda r: (r.ok, -(r.tcp or 0) - (r.tls or 0) -
+                                        (r.ping or 0)))
+    Formatter.print_table([r.row() for r in results],
+                          HealthCheckResult.headers)
@@ -4,7 +4,11 @@
 # accompanying the software ("License").  This software is distributed "AS IS"
 # as set forth in the License.
 
-import copy
+import bisect
+from array import array
+from datetime import datetime, timedelta, timezone
+
+from steelscript.common import timeutils
 
 __all__ = ['Interval', 'IntervalList']
 
@@ -33,6 +37,8 @@ class Interval(object):
         True
     """
 
+    __slots__ = ('start', 'end')
+
     def __init__(self, start=None, end=None):
         self.start = start
         self.end = end
@@ -79,10 +85,7 @@ class Interval(object):
             return IntervalList([])
 
         if isinstance(other, IntervalList):
-            remain = IntervalList([self])
-            for interval in other:
-                remain -= interval
-            return remain
+            return IntervalList([self]).difference(other)
 
         else:  # isinstance(other, Interval):
             if other in self:
@@ -138,24 +141,220 @@ class Interval(object):
         :param interval_list: IntervalList object
         :return: IntervalList object
         """
-        return self - (self - interval_list)
+        return IntervalList([self]).intersection(interval_list)
 
 
-class IntervalList(object):
-    """Creates an object from a list of Interval objects."""
-    def __init__(self, intervals):
-        intervals = sorted(intervals, key=lambda x: (x.start, x.end))
+def _merge(intervals):
+    """Merge the sorted `intervals` into a new list of intervals that
+    neither overlap nor touch."""
+    stack = []
+    for itv in intervals:
+        if stack and stack[-1].end >= itv.start:
+            top = stack[-1]
+            if itv.end > top.end:
+                stack[-1] = top.__class__(top.start, itv.end)
+        else:
+            stack.append(itv)
+    return stack
+
 
-        # Merge overlapping intervals
-        stack = []
-        for itv in intervals:
-            if not stack:
-                stack.append(itv)
+def _normalize(intervals):
+    return _merge(sorted(intervals, key=lambda x: (x.start, x.end)))
+
+
+def _difference(left, right):
+    """Return the parts of the intervals in `left` that are not covered by
+    any interval in `right`, as a merged list.
+
+    Both lists must be normalized.  Works in a single pass over both.
+    """
+    result = []
+    j = 0
+    nright = len(right)
+    for a in left:
+        while j < nright and right[j].end < a.start:
+            j += 1
+
+        pos = a.start
+        pieces = []
+        removed = False
+        k = j
+        while k < nright and right[k].start <= a.end:
+            b = right[k]
+            k += 1
+            if b.start <= pos and b.end >= a.end:
+                removed = True
+                break
+            if b.start > pos:
+                pieces.append((pos, b.start))
+            if b.end > pos:
+                pos = b.end
+
+        if not removed and (pos < a.end or a.start == a.end):
+            pieces.append((pos, a.end))
+
+        if len(pieces) == 1 and pieces[0] == (a.start, a.end):
+            result.append(a)
+        else:
+            result.extend(a.__class__(s, e) for s, e in pieces)
+    return _merge(result)
+
+
+def _intersection(left, right):
+    """Return the parts of the intervals in `left` that are covered by an
+    interval in `right`, as a merged list.
+
+    Both lists must be normalized.  As with `left - (left - right)`, an
+    overlap of a single point is only kept when it is a zero length
+    interval of `left`.
+    """
+    result = []
+    i = j = 0
+    nleft, nright = len(left), len(right)
+    while i < nleft and j < nright:
+        a, b = left[i], right[j]
+        start = max(a.start, b.start)
+        end = min(a.end, b.end)
+        if start < end or (start == end and a.start == a.end and
+                           b.start <= start <= b.end):
+            if start == a.start and end == a.end:
+                result.append(a)
             else:
-                if stack[-1].overlap(itv):
-                    itv = (stack.pop() + itv)[0]
-                stack.append(itv)
-        self.intervals = stack
+                result.append(a.__class__(start, end))
+        if a.end < b.end:
+            i += 1
+        else:
+            j += 1
+    return _merge(result)
+
+
+def _as_intervals(other):
+    if isinstance(other, Interval):
+        return [other]
+    if isinstance(other, IntervalList):
+        return other._index()[0]
+    return _normalize(other)
+
+
+_MICROSECOND = timedelta(microseconds=1)
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _epoch_for(value):
+    """Return the zero that `value` is measured from."""
+    if isinstance(value, datetime):
+        return _EPOCH if value.tzinfo is None else _EPOCH_UTC
+    return 0
+
+
+class _Codec(object):
+    """Stores interval ends unchanged, in a typed array if `typecode` is
+    set or in a list otherwise."""
+
+    def __init__(self, typecode=None):
+        self.typecode = typecode
+
+    def new(self, values=()):
+        if self.typecode is None:
+            return list(values)
+        return array(self.typecode, values)
+
+    def accepts(self, value):
+        if self.typecode is None:
+            return True
+        return value.__class__ is (int if self.typecode == 'q' else float)
+
+    def encode(self, value):
+        return value
+
+
+class _DatetimeCodec(_Codec):
+    """Stores datetimes as integer nanoseconds since the Unix epoch."""
+
+    def __init__(self, aware):
+        super(_DatetimeCodec, self).__init__('q')
+        self.aware = aware
+        self.epoch = _EPOCH_UTC if aware else _EPOCH
+
+    def accepts(self, value):
+        return (value.__class__ is datetime and
+                (value.tzinfo is not None) == self.aware)
+
+    def encode(self, value):
+        return (value - self.epoch) // _MICROSECOND * 1000
+
+
+def _codec_for(values):
+    """Return the most compact codec that can store all of `values`."""
+    classes = set(v.__class__ for v in values)
+    if classes == set([datetime]):
+        aware = set(v.tzinfo is not None for v in values)
+        if len(aware) == 1:
+            return _DatetimeCodec(aware.pop())
+    elif classes == set([int]):
+        return _Codec('q')
+    elif classes == set([float]):
+        return _Codec('d')
+    return _Codec()
+
+
+class IntervalList(object):
+    """Creates an object from a list of Interval objects.
+
+    The intervals are sorted, and intervals that overlap or touch are
+    merged.  IntervalLists support the set operations `union` (`|`),
+    `intersection` (`&`), `difference` (`-`) and `symmetric_difference`
+    (`^`), each computed in a single pass over both sorted lists.
+
+    The Interval objects are kept as given in the `intervals` list.
+    Lookups bisect an index of their starts and ends, kept in typed
+    arrays when the ends are all integers, floats or datetimes (as
+    integer nanoseconds since the epoch).  The index is rebuilt when
+    `intervals` is replaced or its length changes, so replace items of
+    the list rather than changing them in place.
+    """
+    # the intervals the index was built from, see _index()
+    _indexed = None
+    _indexed_len = 0
+
+    def __init__(self, intervals):
+        self.intervals = _normalize(intervals)
+
+    @classmethod
+    def _from_normalized(cls, intervals):
+        obj = cls.__new__(cls)
+        obj.intervals = intervals
+        return obj
+
+    def _index(self):
+        """Return the normalized intervals, the codec of their ends, and
+        sorted arrays of the encoded starts and ends for bisect.  The
+        index is rebuilt after the list changes."""
+        intervals = self.intervals
+        if (self._indexed is not intervals or
+                self._indexed_len != len(intervals)):
+            normalized = _normalize(intervals)
+            if (len(normalized) == len(intervals) and
+                    all(a is b for a, b in zip(normalized, intervals))):
+                # already normalized, which lets add() work in place
+                normalized = intervals
+            codec = _codec_for([itv.start for itv in normalized] +
+                               [itv.end for itv in normalized])
+            try:
+                starts = codec.new([codec.encode(itv.start)
+                                    for itv in normalized])
+                ends = codec.new([codec.encode(itv.end)
+                                  for itv in normalized])
+            except OverflowError:
+                codec = _Codec()
+                starts = [itv.start for itv in normalized]
+                ends = [itv.end for itv in normalized]
+            self._sorted, self._codec = normalized, codec
+            self._starts, self._ends = starts, ends
+            self._indexed = intervals
+            self._indexed_len = len(intervals)
+        return self._sorted, self._codec, self._starts, self._ends
 
     def __repr__(self):
         intervals = ', '.join([repr(interval) for interval in self])
@@ -185,10 +384,136 @@ class IntervalList(object):
         :param other: an Interval object.
         :return: True or False.
         """
-        for interval in self.intervals:
-            if other in interval:
-                return True
-        return False
+        return self.contains(other)
+
+    def contains(self, other):
+        """Return True if the Interval `other` is within one of the
+        intervals in this list.  Runs in O(log n)."""
+        intervals, codec, starts, ends = self._index()
+        i = bisect.bisect_right(starts, codec.encode(other.start)) - 1
+        return i >= 0 and ends[i] >= codec.encode(other.end)
+
+    def covering(self, point):
+        """Return the interval that contains `point`, or None.
+
+        Example:
+            >>>ints = IntervalList([Interval(0, 3), Interval(4, 5)])
+            >>>ints.covering(1)
+            Interval(0, 3)
+
+        :param point: a value comparable with the interval ends.
+        :return: an Interval object or None.
+        """
+        intervals, codec, starts, ends = self._index()
+        point = codec.encode(point)
+        i = bisect.bisect_right(starts, point) - 1
+        if i >= 0 and ends[i] >= point:
+            return intervals[i]
+        return None
+
+    def overlapping(self, interval):
+        """Return the list of intervals that overlap `interval`, in order.
+        Runs in O(log n + k) for k results.
+
+        :param interval: an Interval object.
+        :return: a list of Interval objects.
+        """
+        intervals, codec, starts, ends = self._index()
+        lo = bisect.bisect_left(ends, codec.encode(interval.start))
+        hi = bisect.bisect_right(starts, codec.encode(interval.end))
+        return intervals[lo:hi]
+
+    def gaps(self, within=None):
+        """Return the parts of `within` that are not covered by this list.
+
+        If `within` is None, return the gaps between the intervals in
+        this list.  Runs in O(log n + k) for k overlapping intervals.
+
+        Example:
+            >>>ints = IntervalList([Interval(0, 3), Interval(4, 5)])
+            >>>ints.gaps(Interval(1, 7))
+            IntervalList([Interval(3, 4), Interval(5, 7)])
+
+        :param within: an Interval object or None.
+        :return: an IntervalList object.
+        """
+        if within is None:
+            intervals = self._index()[0]
+            return self._from_normalized(
+                [a.__class__(a.end, b.start)
+                 for a, b in zip(intervals, intervals[1:])])
+
+        return self._from_normalized(
+            _difference([within], self.overlapping(within)))
+
+    def split(self, step, align=True):
+        """Generate the buckets of size `step` that cover this list.
+
+        Each bucket is an Interval from a boundary to the next boundary.
+        Buckets that overlap the intervals by more than a single point
+        are generated in order, each one once.  Zero length intervals
+        are covered by the bucket that starts at or before them.
+
+        Example:
+            >>>ints = IntervalList([Interval(5, 12), Interval(25, 31)])
+            >>>list(ints.split(10))
+            [Interval(0, 10), Interval(10, 20), Interval(20, 30),
+             Interval(30, 40)]
+
+        :param step: size of the buckets, a number or a
+            `datetime.timedelta`.  Strings such as "1 hour" are parsed
+            with `timeutils.parse_timedelta`.
+        :param align: True to place the boundaries at multiples of `step`
+            from the epoch (or zero for numbers), a unit such as "hour"
+            or "day" to place them at multiples of `step` from
+            `timeutils.floor_dt` of each interval start, or False to
+            start them at each interval start.
+        :return: generator of Interval objects.
+        """
+        if isinstance(step, str):
+            step = timeutils.parse_timedelta(step)
+
+        last = None
+        for itv in self._index()[0]:
+            if align is True:
+                origin = _epoch_for(itv.start)
+            elif align:
+                origin = timeutils.floor_dt(itv.start, align, keep_tzinfo=True)
+            else:
+                origin = itv.start
+            start = origin + (itv.start - origin) // step * step
+
+            if last is not None and start <= last:
+                # the bucket containing itv.start was already generated
+                start = last + step
+
+            while start < itv.end or (start == itv.start == itv.end):
+                yield itv.__class__(start, start + step)
+                last = start
+                start += step
+
+    def coverage(self, other, step, align=True):
+        """Split `other` into buckets and report which this list covers.
+
+        This is useful to find which parts of a requested time range
+        are already cached, where self holds the cached intervals.
+
+        :param other: an Interval or IntervalList object.
+        :param step: size of the buckets, see `split`.
+        :param align: how to align the buckets, see `split`.
+        :return: tuple of two lists of bucket Interval objects, the
+            buckets within this list and the buckets that are missing.
+        """
+        if isinstance(other, Interval):
+            other = IntervalList([other])
+
+        covered, missing = [], []
+        for bucket in other.split(step, align):
+            if self.contains(bucket):
+                covered.append(bucket)
+            else:
+                missing.append(bucket)
+        return covered, missing
 
     def __sub__(self, other):
         """Subtracting one Interval object or an IntervalList object.
@@ -205,11 +530,44 @@ class IntervalList(object):
         :param other: an Interval object or an IntervalList object
         :return: an IntervalList object
         """
-        l = []
-        for interval in self:
-            remain = interval - other
-            l.extend(remain.intervals)
-        return IntervalList(l)
+        return self.difference(other)
+
+    def union(self, other):
+        """Return an IntervalList covering everything covered by self or
+        by `other`, an Interval or IntervalList object."""
+        if isinstance(other, Interval):
+            result = self._copy()
+            result.add(other)
+            return result
+        return self._from_normalized(
+            _merge(sorted(self._index()[0] + _as_intervals(other),
+                          key=lambda x: (x.start, x.end))))
+
+    def intersection(self, other):
+        """Return an IntervalList covering what is covered by both self and
+        `other`, an Interval or IntervalList object."""
+        return self._from_normalized(
+            _intersection(self._index()[0], _as_intervals(other)))
+
+    def difference(self, other):
+        """Return an IntervalList covering what is covered by self but not
+        by `other`, an Interval or IntervalList object."""
+        return self._from_normalized(
+            _difference(self._index()[0], _as_intervals(other)))
+
+    def symmetric_difference(self, other):
+        """Return an IntervalList covering what is covered by exactly one
+        of self and `other`, an Interval or IntervalList object."""
+        left = self._index()[0]
+        right = _as_intervals(other)
+        return self._from_normalized(
+            _merge(sorted(_difference(left, right) +
+                          _difference(right, left),
+                          key=lambda x: (x.start, x.end))))
+
+    __or__ = union
+    __and__ = intersection
+    __xor__ = symmetric_difference
 
     def __eq__(self, other):
         """Check if two IntervalList objects are equivalent.
@@ -227,7 +585,7 @@ class IntervalList(object):
             all([self[i] == other[i] for i in range(len(self))])
 
     def __add__(self, other):
-        """Merge one Interval object into self.
+        """Merge one Interval object into a copy of self.
 
         Example:
              >>>int1 = Interval(2, 3)
@@ -238,9 +596,55 @@ class IntervalList(object):
         :param other: An Interval object.
         :return: An IntervalList object.
         """
-        intervals = copy.copy(self.intervals)
-        intervals.append(other)
-        return IntervalList(intervals)
+        result = self._copy()
+        result.add(other)
+        return result
+
+    def _copy(self):
+        intervals, codec, starts, ends = self._index()
+        obj = self.__class__.__new__(self.__class__)
+        obj.intervals = obj._sorted = obj._indexed = intervals[:]
+        obj._indexed_len = len(intervals)
+        obj._codec, obj._starts, obj._ends = codec, starts[:], ends[:]
+        return obj
 
-    def append(self, other):
-        self.intervals.append(other)
+    def add(self, other):
+        """Merge the Interval `other` into this list in place.
+
+        The intervals it overlaps or touches are found by bisection and
+        replaced by one merged interval, without re-sorting the list.
+
+        :param other: An Interval object.
+        """
+        intervals, codec, starts, ends = self._index()
+        if (intervals is not self.intervals or not intervals or
+                not codec.accepts(other.start) or
+                not codec.accepts(other.end)):
+            self.intervals = _normalize(self.intervals + [other])
+            return
+
+        start, end = codec.encode(other.start), codec.encode(other.end)
+        lo = bisect.bisect_left(ends, start)
+        hi = bisect.bisect_right(starts, end)
+        merged = other
+        if lo < hi:
+            # merge as _merge would, keeping the first interval's class
+            first, last = intervals[lo], intervals[hi - 1]
+            if (first.start, first.end) <= (other.start, other.end):
+                merged = first
+            if max(last.end, other.end) > merged.end:
+                merged = merged.__class__(merged.start,
+                                          max(last.end, other.end))
+            start = min(start, starts[lo])
+            end = max(end, ends[hi - 1])
+        try:
+            start, end = codec.new([start]), codec.new([end])
+        except OverflowError:
+            self.intervals = _normalize(intervals + [other])
+            return
+        starts[lo:hi] = start
+        ends[lo:hi] = end
+        intervals[lo:hi] = [merged]
+        self._indexed_len = len(intervals)
+
+    append = add
@@ -9,6 +9,15 @@ from __future__ import (unicode_literals, print_function, division,
                         absolute_import)
 
 import time
+import heapq
+import inspect
+import asyncio
+import functools
+import itertools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, InvalidStateError
+
+from steelscript.common.exceptions import RvbdTimeoutException
 
 
 def do_poll(func, *args, **kwargs):
@@ -36,6 +45,10 @@ def do_poll(func, *args, **kwargs):
     :param min_poll_interval:  Min seconds between calls.  Default 3.
 
     :return:  An iterable generator that calls func with args and kwargs.
+
+    For deadlines, adaptive intervals or many concurrent polls, see
+    `Poller` and `poll_async`.  For use in asyncio code, see
+    `async_do_poll`.
     """
     # Note: In Python3 we would make these keyword-only arguments.
     max_poll_retries = kwargs.pop('max_poll_retries', 10)
@@ -50,3 +63,344 @@ def do_poll(func, *args, **kwargs):
         last_time = time.time()
         yield func(*args, **kwargs)
         retries += 1
+
+
+async def async_do_poll(func, *args, **kwargs):
+    """
+    Asynchronous counterpart of `do_poll`, for use with `async for`.
+
+    Calls func with *args and **kwargs on each iteration, stopping after
+    max_poll_retries calls and waiting with `asyncio.sleep` so that each
+    call is at least min_poll_interval apart.  If func is a coroutine
+    function, or returns an awaitable, the result is awaited.  Plain
+    functions are run in the loop's default executor so that they never
+    block the event loop.
+
+        async def wait_for_reboot(sh):
+            async for up in async_do_poll(is_up, sh=sh, max_poll_retries=20):
+                if up:
+                    return True
+            return False
+
+    Cancellation and timeouts work as for any coroutine, e.g. wrap the
+    consuming coroutine in `asyncio.wait_for`.
+
+    :param func:  Function or coroutine function called on each iteration
+    :param max_poll_retries:  Max times to call func.  Default 10.
+    :param min_poll_interval:  Min seconds between calls.  Default 3.
+
+    :return:  An asynchronous generator of the results of func.
+    """
+    max_poll_retries = kwargs.pop('max_poll_retries', 10)
+    min_poll_interval = kwargs.pop('min_poll_interval', 3)
+
+    loop = asyncio.get_running_loop()
+    is_coro = asyncio.iscoroutinefunction(func)
+    retries = 0
+    last_time = 0
+    while retries < max_poll_retries:
+        now_time = loop.time()
+        if last_time and now_time < last_time + min_poll_interval:
+            await asyncio.sleep(min_poll_interval + last_time - now_time)
+        last_time = loop.time()
+        if is_coro:
+            result = await func(*args, **kwargs)
+        else:
+            result = await loop.run_in_executor(
+                None, functools.partial(func, *args, **kwargs))
+            if inspect.isawaitable(result):
+                result = await result
+        yield result
+        retries += 1
+
+
+class PollSchedule(object):
+    """
+    Poll intervals that start at `min_interval` and grow by a factor of
+    `backoff` up to `max_interval`.
+
+    If `expected` is given -- typically the observed completion time of
+    similar operations, see `CompletionStats` -- the first poll is held
+    back until shortly before that time instead of polling immediately,
+    so slow operations are not polled repeatedly and fast ones are not
+    kept waiting.
+
+    :param min_interval:  Min seconds between polls.  Default 1.
+    :param max_interval:  Max seconds between polls.  Default 30.
+    :param backoff:  Growth factor of the interval.  Default 1.5.
+    :param expected:  Expected seconds until completion, or None.
+    """
+
+    def __init__(self, min_interval=1, max_interval=30, backoff=1.5,
+                 expected=None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.expected = expected
+
+    def __repr__(self):
+        return ('<PollSchedule %s-%ss x%s expected %s>'
+                % (self.min_interval, self.max_interval, self.backoff,
+                   self.expected))
+
+    def first_delay(self):
+        """Seconds to wait before the first poll."""
+        if self.expected is None:
+            return 0
+        return min(max(self.expected * 0.8, self.min_interval),
+                   self.max_interval)
+
+    def next_delay(self, delay):
+        """Seconds to wait after a poll that followed a wait of `delay`."""
+        return min(max(delay * self.backoff, self.min_interval),
+                   self.max_interval)
+
+    def delays(self):
+        """Generator of the successive delays before each poll."""
+        delay = self.first_delay()
+        while True:
+            yield delay
+            delay = self.next_delay(delay)
+
+
+class CompletionStats(object):
+    """
+    Exponentially weighted moving average of completion times, kept per
+    name, used to build adaptive `PollSchedule` objects.
+    """
+
+    def __init__(self, weight=0.3):
+        self.weight = weight
+        self._avg = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        return self._avg.get(name)
+
+    def add(self, name, elapsed):
+        with self._lock:
+            avg = self._avg.get(name)
+            if avg is None:
+                self._avg[name] = elapsed
+            else:
+                self._avg[name] = avg + self.weight * (elapsed - avg)
+
+    def schedule(self, name, **kwargs):
+        """Return a PollSchedule for `name`, `kwargs` are passed to
+        PollSchedule."""
+        kwargs.setdefault('expected', self.get(name) if name else None)
+        return PollSchedule(**kwargs)
+
+
+def _deadline_error(func, deadline):
+    name = getattr(func, '__name__', repr(func))
+    return RvbdTimeoutException('Polling %s did not complete within %s '
+                                'seconds' % (name, deadline))
+
+
+async def poll_async(func, *args, **kwargs):
+    """
+    Call `func` with *args and **kwargs until `until` is true of its
+    result, and return that result.  The waits between calls use
+    `asyncio.sleep`, so many polls share a single event loop.
+
+    `func` may be a coroutine function, or a plain function which is
+    run in the loop's default executor.
+
+    :param until:  Predicate on the result of func.  Default bool.
+    :param schedule:  PollSchedule to use.  Default PollSchedule().
+    :param deadline:  Max seconds to poll before raising
+        RvbdTimeoutException.  Default None, poll forever.
+    :param name:  Name used to look up and record completion times in
+        `stats`.
+    :param stats:  CompletionStats object used to build the schedule
+        when none is given.
+    :param executor:  Executor used to run a plain function, default
+        is the loop's default executor.
+
+    :return:  The first result of func for which until is true.
+    """
+    until = kwargs.pop('until', bool)
+    name = kwargs.pop('name', None)
+    stats = kwargs.pop('stats', None)
+    schedule = kwargs.pop('schedule', None)
+    deadline = kwargs.pop('deadline', None)
+    executor = kwargs.pop('executor', None)
+    if schedule is None:
+        schedule = stats.schedule(name) if stats else PollSchedule()
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for delay in schedule.delays():
+        if delay:
+            if (deadline is not None and
+                    loop.time() - start + delay > deadline):
+                raise _deadline_error(func, deadline)
+            await asyncio.sleep(delay)
+
+        if asyncio.iscoroutinefunction(func):
+            result = await func(*args, **kwargs)
+        else:
+            result = await loop.run_in_executor(
+                executor, functools.partial(func, *args, **kwargs))
+
+        if until(result):
+            if stats is not None and name:
+                stats.add(name, loop.time() - start)
+            return result
+
+
+class _PollTask(object):
+    __slots__ = ('func', 'until', 'future', 'schedule', 'delay', 'start',
+                 'deadline', 'name')
+
+
+class Poller(object):
+    """
+    Poll many functions concurrently from a single timer thread.
+
+    Pending polls are kept in one time-ordered heap, and a single timer
+    thread hands each poll that is due to a shared thread pool.  A poll
+    that is waiting for its next turn holds no thread, so thousands of
+    concurrent polls cost one timer thread plus `max_workers` threads.
+
+        >>> poller = Poller()
+        >>> f = poller.submit(job_status, job_id, until=lambda s: s.done,
+        ...                   deadline=300)
+        >>> status = f.result()
+    """
+
+    def __init__(self, max_workers=16, stats=None):
+        """
+        :param max_workers:  Threads used to call the polled functions.
+        :param stats:  CompletionStats shared by the polls, a new one is
+            created if not given.
+        """
+        self.max_workers = max_workers
+        self.stats = stats if stats is not None else CompletionStats()
+
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._executor = None
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def _start(self):
+        # caller must hold self._cond
+        if self._closed:
+            raise RuntimeError('Poller is closed')
+        if self._thread is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix='poller')
+            self._thread = threading.Thread(target=self._timer,
+                                            name='poller-timer', daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Stop the timer thread.  Pending polls are cancelled."""
+        with self._cond:
+            self._closed = True
+            pending = [task for _, _, task in self._heap]
+            self._heap = []
+            self._cond.notify()
+        for task in pending:
+            task.future.cancel()
+        if self._thread is not None:
+            self._thread.join()
+            self._executor.shutdown(wait=True)
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Start polling `func` with *args and **kwargs.
+
+        Accepts the `until`, `schedule`, `deadline` and `name` keyword
+        arguments of `poll_async`.
+
+        :return:  A `concurrent.futures.Future` set to the first result
+            for which until is true, or to RvbdTimeoutException if the
+            deadline passes first.  Cancel the future to stop polling.
+        """
+        task = _PollTask()
+        task.until = kwargs.pop('until', bool)
+        task.name = kwargs.pop('name', None)
+        task.schedule = kwargs.pop('schedule', None)
+        task.deadline = kwargs.pop('deadline', None)
+        if task.schedule is None:
+            task.schedule = self.stats.schedule(task.name)
+        task.func = functools.partial(func, *args, **kwargs)
+        task.future = Future()
+        task.start = time.monotonic()
+        task.delay = task.schedule.first_delay()
+
+        with self._cond:
+            self._start()
+            self._push(task, task.start + task.delay)
+        return task.future
+
+    def _push(self, task, due):
+        # caller must hold self._cond
+        heapq.heappush(self._heap, (due, next(self._seq), task))
+        if self._heap[0][2] is task:
+            self._cond.notify()
+
+    def _timer(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    now = time.monotonic()
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    timeout = self._heap[0][0] - now if self._heap else None
+                    self._cond.wait(timeout)
+                if self._closed:
+                    return
+                _, _, task = heapq.heappop(self._heap)
+
+            if not task.future.cancelled():
+                self._executor.submit(self._check, task)
+
+    def _resolve(self, task, result=None, exc=None):
+        try:
+            if exc is not None:
+                task.future.set_exception(exc)
+            else:
+                task.future.set_result(result)
+        except InvalidStateError:
+            # cancelled by the caller while the poll was running
+            pass
+
+    def _check(self, task):
+        if task.future.cancelled():
+            return
+        try:
+            result = task.func()
+            done = task.until(result)
+        except Exception as e:
+            self._resolve(task, exc=e)
+            return
+
+        elapsed = time.monotonic() - task.start
+        if done:
+            if task.name:
+                self.stats.add(task.name, elapsed)
+            self._resolve(task, result)
+            return
+
+        task.delay = task.schedule.next_delay(task.delay)
+        if task.deadline is not None and elapsed + task.delay > task.deadline:
+            self._resolve(task,
+                          exc=_deadline_error(task.func.func, task.deadline))
+            return
+
+        with self._cond:
+            if self._closed:
+                task.future.cancel()
+                return
+            self._push(task, time.monotonic() + task.delay)
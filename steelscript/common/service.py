@@ -29,6 +29,7 @@ import base64
 import logging
 import hashlib
 import time
+import threading
 
 import http.client
 import urllib.parse
@@ -43,6 +44,18 @@ __all__ = ['Service', 'Auth', 'UserAuth', 'OAuth', 'OAuth2_ClientCredentials', '
 
 logger = logging.getLogger(__name__)
 
+# Versions supported by each (host, port, services api, service), and the
+# version negotiated for each (host, port, service, requested versions).
+# Shared by all Service instances so that only the first instance
+# created for a host has to fetch the services list.
+_supported_versions_cache = {}
+_negotiated_versions_cache = {}
+# Most recently negotiated version per (host, port, service)
+_latest_versions = {}
+# Guards the caches above, which services initialized in background
+# threads share
+_versions_lock = threading.Lock()
+
 
 class Auth(object):
     NONE = 0
@@ -118,7 +131,8 @@ class Service(object):
     - "common" resources
 
     A connection is established as soon as the an instance of this object
-    is created.  Requests can be made via the `Service.conn` property.
+    is created, or on first use when created with `lazy=True`.  Requests
+    can be made via the `Service.conn` property.
     """
     def __init__(self, service, host=None, port=None, auth=None,
                  verify_ssl=False, versions=None,
@@ -127,7 +141,8 @@ class Service(object):
                  supports_auth_cookie=False, override_cookie_login_api = '/api/common/1.0/login',
                  supports_auth_oauth=False, override_oauth_token_api='/api/common/1.0/oauth/token',
                  supports_auth_oauth2_client_credentials=False,
-                 enable_services_version_detection=True,override_services_api='/api/common/1.0/services'
+                 enable_services_version_detection=True,override_services_api='/api/common/1.0/services',
+                 lazy=False
                  ):
         """Establish a connection to the named host.
 
@@ -180,6 +195,10 @@ class Service(object):
         `override_cookie_login_api to set the cookie login api path
             For example: '/api/common/1.0/login'
 
+        `lazy` when set to True returns without any network I/O.  The
+            connection, API version check and authentication happen on
+            first access to `conn`, or when `initialize()` is called,
+            possibly in a background thread.
 
 
         """
@@ -188,8 +207,8 @@ class Service(object):
         self.host = host
         self.port = port
 
-        # Connection object.  Use this to make REST requests to the device.
-        self.conn = None
+        # Connection object, see the `conn` property.
+        self._conn = None
 
         self.verify_ssl = verify_ssl
 
@@ -213,14 +232,81 @@ class Service(object):
         
         self._services_version_detection_enabled = enable_services_version_detection
         self._services_api = override_services_api
-       
+
+        if lazy:
+            self._initialized = False
+            self._pending_init = (versions, auth)
+            self._init_lock = threading.RLock()
+        else:
+            self._initialize(versions, auth)
+
+    # Lazy initialization state, overridden per instance when lazy=True
+    _initialized = True
+    _pending_init = None
+    _conn = None
+
+    @property
+    def conn(self):
+        """Connection object.  Use this to make REST requests to the device.
+
+        For a Service created with `lazy=True`, the first access connects
+        to the device, checks API versions and authenticates.
+        """
+        if not self._initialized:
+            self._ensure_initialized()
+        return self._conn
+
+    @conn.setter
+    def conn(self, value):
+        self._conn = value
+
+    def _initialize(self, versions, auth):
         self.connect()
 
-        if enable_services_version_detection:
+        if self._services_version_detection_enabled:
             self.check_api_versions(versions)
 
         if auth is not None:
-            self.authenticate(auth)        
+            self.authenticate(auth)
+
+    def _ensure_initialized(self):
+        with self._init_lock:
+            pending = self._pending_init
+            if self._initialized or pending is None:
+                # done, or being done further up this thread's stack
+                return
+            self._pending_init = None
+            try:
+                self._initialize(*pending)
+            except Exception:
+                # leave it to the next access to try again
+                self._pending_init = pending
+                raise
+            self._initialized = True
+
+    def initialize(self, background=False):
+        """Complete the deferred setup of a Service created with
+        `lazy=True`.  This has no effect if setup is already done.
+
+        `background` when set to True runs the setup in a daemon thread
+            and returns the thread.  Errors are logged, and raised again
+            on the next access to `conn`.
+        """
+        if not background:
+            self._ensure_initialized()
+            return None
+
+        def run():
+            try:
+                self._ensure_initialized()
+            except Exception as e:
+                logger.warning("Background initialization of %s for host "
+                               "%s failed: %s" % (self.service, self.host, e))
+
+        t = threading.Thread(target=run, daemon=True,
+                             name='init-%s-%s' % (self.service, self.host))
+        t.start()
+        return t
 
     def __enter__(self):
         return self
@@ -229,8 +315,8 @@ class Service(object):
         self.logout()
 
     def connect(self):
-        if self.conn is not None and hasattr(self.conn, 'close'):
-            self.conn.close()
+        if self._conn is not None and hasattr(self._conn, 'close'):
+            self._conn.close()
 
         self.conn = connection.Connection(
             self.host, port=self.port,
@@ -240,21 +326,49 @@ class Service(object):
 
     def logout(self):
         """End the authenticated session with the device."""
-        if self.conn:
-            self.conn.del_headers(['Authorization', 'Cookie'])
+        if self._conn:
+            self._conn.del_headers(['Authorization', 'Cookie'])
+
+    def check_api_versions(self, api_versions, refresh=False):
+        """Check that the server supports the given API versions.
 
-    def check_api_versions(self, api_versions):
-        """Check that the server supports the given API versions."""
+        The list of versions supported by the server is fetched once per
+        host and service and shared by all Service instances, set
+        `refresh` to True to fetch it again.
+        """
         if self.conn is None:
             raise RvbdException("Not connected")
-        
-        try:
-            self.supported_versions = self._get_supported_versions()
-        except RvbdHTTPException as e:
-            if e.status != 404:
-                raise
-            logger.warning("Failed to retrieved supported versions")
-            self.supported_versions = None
+
+        key = (self.host, self.port, self._services_api, self.service)
+        with _versions_lock:
+            supported = _supported_versions_cache.get(key)
+        if refresh or supported is None:
+            # fetched without holding the lock, concurrent callers may
+            # both fetch the list
+            try:
+                supported = self._get_supported_versions()
+            except RvbdHTTPException as e:
+                if e.status != 404:
+                    raise
+                logger.warning("Failed to retrieved supported versions")
+                supported = None
+            with _versions_lock:
+                # a missing list is not cached, so it is fetched again
+                if supported is None:
+                    _supported_versions_cache.pop(key, None)
+                else:
+                    supported = tuple(supported)
+                    _supported_versions_cache[key] = supported
+                # drop versions negotiated against the old list
+                for k in [k for k in _negotiated_versions_cache
+                          if k[:3] == (self.host, self.port, self.service)]:
+                    del _negotiated_versions_cache[k]
+                _latest_versions.pop((self.host, self.port, self.service),
+                                     None)
+
+        # each instance gets its own list, the cached tuple is shared
+        self.supported_versions = (None if supported is None
+                                   else list(supported))
 
         if self.supported_versions is None:
             return False
@@ -265,18 +379,48 @@ class Service(object):
         if api_versions is None:
             return True
 
-        for v in api_versions:
-            if v in self.supported_versions:
-                self.api_version = v
-                logger.debug("Service '%s' supports version '%s'" %
-                             (self.service, v))
-                return True
+        api_versions = [v if isinstance(v, APIVersion) else APIVersion(v)
+                        for v in api_versions]
+        nkey = (self.host, self.port, self.service, tuple(api_versions))
+        with _versions_lock:
+            v = _negotiated_versions_cache.get(nkey)
+            if v is None:
+                supported = frozenset(self.supported_versions)
+                for v in api_versions:
+                    if v in supported:
+                        _negotiated_versions_cache[nkey] = v
+                        break
+                else:
+                    v = None
+            if v is not None:
+                _latest_versions[nkey[:3]] = v
+
+        if v is not None:
+            self.api_version = v
+            logger.debug("Service '%s' supports version '%s'" %
+                         (self.service, v))
+            return True
 
         msg = ("API version(s) %s not supported (supported version(s): %s)" %
                (', '.join([str(v) for v in api_versions]),
                 ', '.join([str(v) for v in self.supported_versions])))
         raise RvbdException(msg)
 
+    @classmethod
+    def lookup_api_version(cls, host, service, port=None):
+        """Return the API version last negotiated with `service` on `host`,
+        or None if no Service instance has negotiated one yet."""
+        with _versions_lock:
+            return _latest_versions.get((host, port, service))
+
+    @classmethod
+    def clear_api_version_cache(cls):
+        """Forget all cached supported and negotiated API versions."""
+        with _versions_lock:
+            _supported_versions_cache.clear()
+            _negotiated_versions_cache.clear()
+            _latest_versions.clear()
+
     def _get_supported_versions(self):
         """Get the common list of services and versions supported."""
         # uses the GL7 'services' resource.
@@ -0,0 +1,63 @@
+# Copyright (c) 2019 Riverbed Technology, Inc.
+#
+# This software is licensed under the terms and conditions of the MIT License
+# accompanying the software ("License").  This software is distributed "AS IS"
+# as set forth in the License.
+
+import os
+import shutil
+import optparse
+import tempfile
+import unittest
+
+import mock
+
+from steelscript.common.app import Application
+
+
+class OutputTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def app(self, output_format=None, output_file=None):
+        app = Application()
+        app.options = optparse.Values({'output_format': output_format,
+                                       'output_file': output_file})
+        return app
+
+    def test_output_format(self):
+        self.assertEqual(self.app().output_format(), 'table')
+        self.assertEqual(self.app(output_file='x.csv.gz').output_format(),
+                         'csv')
+        self.assertEqual(self.app(output_file='x.txt').output_format(),
+                         'table')
+        self.assertEqual(self.app('columns', 'x.txt').output_format(),
+                         'columns')
+
+    def test_table(self):
+        path = os.path.join(self.dir, 'out.txt')
+        self.app(output_file=path).write_output([['a', 1], ['b', 2]],
+                                                headers=['host', 'count'])
+        with open(path) as f:
+            words = f.read().split()
+        self.assertEqual(words[:2] + words[3:],
+                         ['host', 'count', 'a', '1', 'b', '2'])
+
+        app = self.app()
+        self.assertRaises(ValueError, app.write_output, [['a', 1]])
+        with mock.patch('sys.stdout') as stdout:
+            app.write_output([])
+            app.write_output([{'host': 'a'}])
+        self.assertTrue(stdout.write.called)
+
+    def test_empty(self):
+        for name in ('empty.txt', 'empty.csv', 'empty.cols'):
+            path = os.path.join(self.dir, name)
+            self.app(output_file=path).write_output([])
+            self.assertTrue(os.path.exists(path), name)
+
+
+if __name__ == '__main__':
+    unittest.main()
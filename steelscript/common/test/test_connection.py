@@ -0,0 +1,102 @@
+# Copyright (c) 2019 Riverbed Technology, Inc.
+#
+# This software is licensed under the terms and conditions of the MIT License
+# accompanying the software ("License").  This software is distributed "AS IS"
+# as set forth in the License.
+
+import socket
+import unittest
+
+import mock
+import requests
+
+from steelscript.common.connection import Connection, CircuitBreaker
+from steelscript.common.exceptions import RvbdConnectException
+
+
+def unused_port():
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.bind(('127.0.0.1', 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+class CircuitBreakerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch('steelscript.common.connection.time.monotonic',
+                             side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_opens_after_threshold(self):
+        cb = CircuitBreaker('host', failure_threshold=3, reset_timeout=10)
+        for i in range(2):
+            cb.before_request()
+            cb.record_failure()
+        self.assertEqual(cb.state, CircuitBreaker.CLOSED)
+
+        cb.record_failure()
+        self.assertEqual(cb.state, CircuitBreaker.OPEN)
+        self.assertRaises(RvbdConnectException, cb.before_request)
+
+    def test_success_resets_count(self):
+        cb = CircuitBreaker('host', failure_threshold=2, reset_timeout=10)
+        cb.record_failure()
+        cb.record_success()
+        cb.record_failure()
+        self.assertEqual(cb.state, CircuitBreaker.CLOSED)
+
+    def test_half_open(self):
+        cb = CircuitBreaker('host', failure_threshold=1, reset_timeout=10)
+        cb.record_failure()
+        self.assertEqual(cb.state, CircuitBreaker.OPEN)
+
+        self.now += 10
+        self.assertEqual(cb.state, CircuitBreaker.HALF_OPEN)
+
+        # only a single trial request goes through
+        cb.before_request()
+        self.assertRaises(RvbdConnectException, cb.before_request)
+
+        # a failed trial opens the circuit again
+        cb.record_failure()
+        self.assertEqual(cb.state, CircuitBreaker.OPEN)
+
+        self.now += 10
+        cb.before_request()
+        cb.record_success()
+        self.assertEqual(cb.state, CircuitBreaker.CLOSED)
+        cb.before_request()
+
+
+class ConnectionCircuitTests(unittest.TestCase):
+
+    def setUp(self):
+        CircuitBreaker.reset_all()
+        self.addCleanup(CircuitBreaker.reset_all)
+
+    def test_fail_fast(self):
+        host = 'http://127.0.0.1:%d' % unused_port()
+        conn = Connection(host)
+        for i in range(Connection.CIRCUIT_FAILURE_THRESHOLD):
+            self.assertRaises(requests.exceptions.ConnectionError,
+                              conn.json_request, 'GET', '/api/ping')
+
+        # the breaker is shared by new connections to the same host
+        conn = Connection(host)
+        with mock.patch.object(conn.conn, 'request') as request:
+            self.assertRaises(RvbdConnectException,
+                              conn.json_request, 'GET', '/api/ping')
+            self.assertFalse(request.called)
+
+    def test_disabled(self):
+        with mock.patch.object(Connection, 'CIRCUIT_FAILURE_THRESHOLD', 0):
+            conn = Connection('http://127.0.0.1:%d' % unused_port())
+        self.assertIsNone(conn.breaker)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+# Copyright (c) 2019 Riverbed Technology, Inc.
+#
+# This software is licensed under the terms and conditions of the MIT License
+# accompanying the software ("License").  This software is distributed "AS IS"
+# as set forth in the License.
+
+import io
+import os
+import gzip
+import tempfile
+import unittest
+from array import array
+
+from steelscript.common.datautils import (Formatter, bytes2human,
+                                          bytes2human_column, human2bytes,
+                                          human2bytes_column)
+
+
+HEADERS = ['name', 'value']
+DATA = [['a', 1], ['bbbbbb', 22], ['cc', 333]]
+
+
+class PrintTableTest(unittest.TestCase):
+
+    def test_print_table(self):
+        out = io.StringIO()
+        Formatter.print_table(DATA, HEADERS, padding=2, stream=out)
+        self.assertEqual(out.getvalue().splitlines(),
+                         ['',
+                          'name    value  ',
+                          '---------------',
+                          'a       1      ',
+                          'bbbbbb  22     ',
+                          'cc      333    '])
+
+    def test_stream_matches(self):
+        expected = io.StringIO()
+        Formatter.print_table(DATA, HEADERS, paginate=2, stream=expected)
+        out = io.StringIO()
+        Formatter.print_table_stream(iter(DATA), HEADERS, paginate=2,
+                                     stream=out)
+        self.assertEqual(out.getvalue(), expected.getvalue())
+
+    def test_stream_is_incremental(self):
+        produced = []
+
+        def rows():
+            for i in range(1000):
+                produced.append(i)
+                yield [i, 'x']
+
+        class Output(object):
+            first_write = None
+
+            def write(self, s):
+                if self.first_write is None:
+                    self.first_write = len(produced)
+
+        out = Output()
+        Formatter.print_table_stream(rows(), HEADERS, widths=[4, 5],
+                                     stream=out)
+        self.assertEqual(out.first_write, 1)
+        self.assertEqual(len(produced), 1000)
+
+
+class CSVTest(unittest.TestCase):
+
+    def test_quoting(self):
+        out = io.StringIO()
+        Formatter.write_csv(iter([['a,b', 'say "hi"'], ['x\ny', None]]),
+                            HEADERS, dest=out)
+        self.assertEqual(out.getvalue(),
+                         'name,value\r\n'
+                         '"a,b","say ""hi"""\r\n'
+                         '"x\ny",\r\n')
+
+    def test_get_csv(self):
+        self.assertEqual(Formatter.get_csv(DATA, HEADERS, delim=';'),
+                         ['name;value', 'a;1', 'bbbbbb;22', 'cc;333'])
+
+    def test_gzip(self):
+        fd, path = tempfile.mkstemp(suffix='.csv.gz')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+
+        Formatter.write_csv((row for row in DATA), HEADERS, dest=path)
+        with gzip.open(path, 'rt', newline='') as f:
+            self.assertEqual(f.read(),
+                             'name,value\r\na,1\r\nbbbbbb,22\r\ncc,333\r\n')
+
+        out = io.BytesIO()
+        Formatter.write_csv(DATA, None, dest=out, compress=True,
+                            lineterminator='\n')
+        self.assertFalse(out.closed)
+        self.assertEqual(gzip.decompress(out.getvalue()),
+                         b'a,1\nbbbbbb,22\ncc,333\n')
+
+
+class HumanBytesTest(unittest.TestCase):
+
+    def test_bytes2human(self):
+        self.assertEqual(bytes2human(10000), '9K')
+        self.assertEqual(bytes2human(100001221), '95M')
+        self.assertEqual(bytes2human(1023), '1023B')
+        self.assertEqual(bytes2human(1 << 90), '1024Y')
+        self.assertEqual(bytes2human(1536.0, '%(value).1f %(symbol)s'),
+                         '1.5 K')
+
+    def test_bytes2human_column(self):
+        values = [0, 1023, 1024, 10000, 100001221, 1 << 90, 1536.0, -5]
+        self.assertEqual(bytes2human_column(values),
+                         [bytes2human(n) for n in values])
+        self.assertEqual(bytes2human_column(values[2:], '%(value).1f'),
+                         [bytes2human(n, '%(value).1f') for n in values[2:]])
+
+    def test_human2bytes(self):
+        self.assertEqual(human2bytes('1M'), 1048576)
+        self.assertEqual(human2bytes('1.5 k'), 1536)
+        self.assertEqual(human2bytes('10'), 10)
+        self.assertRaises(AssertionError, human2bytes, '1X')
+
+    def test_human2bytes_column(self):
+        self.assertEqual(human2bytes_column(['1M', '2K', '1M']),
+                         array('q', [1048576, 2048, 1048576]))
+        self.assertEqual(human2bytes_column(['7Y']), [7 << 80])
+
+
+if __name__ == '__main__':
+    unittest.main()
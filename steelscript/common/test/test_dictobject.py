@@ -0,0 +1,87 @@
+# Copyright (c) 2019 Riverbed Technology, Inc.
+#
+# This software is licensed under the terms and conditions of the MIT License
+# accompanying the software ("License").  This software is distributed "AS IS"
+# as set forth in the License.
+
+import json
+import unittest
+from collections import OrderedDict
+
+from steelscript.common.datastructures import DictObject
+
+
+DATA = {b'name': b'John',
+        'rows': [{'a': 1}, [{b'b': b'x'}], b'y'],
+        'nested': {'deep': {'value': 3}}}
+
+JSON_DATA = {'name': 'John',
+             'rows': [{'a': 1}, [{'b': 'x'}], 'y'],
+             'nested': {'deep': {'value': 3}}}
+
+
+class DictObjectTest(unittest.TestCase):
+
+    def check(self, d):
+        self.assertEqual(d.name, 'John')
+        self.assertEqual(d.rows[0].a, 1)
+        self.assertEqual(d.rows[1][0].b, 'x')
+        self.assertEqual(d.rows[2], 'y')
+        self.assertEqual(d.nested.deep.value, 3)
+        self.assertIsInstance(d.nested.deep, DictObject)
+        self.assertEqual(d, JSON_DATA)
+
+    def test_create(self):
+        self.check(DictObject.create_from_dict(DATA))
+
+    def test_from_json(self):
+        self.check(DictObject.create_from_dict(JSON_DATA, from_json=True))
+
+    def test_lazy(self):
+        d = DictObject.create_from_dict(DATA, lazy=True)
+        self.assertIs(type(dict.__getitem__(d, 'nested')), dict)
+        self.check(d)
+        self.assertIs(d.nested, d.nested)
+        self.assertEqual([type(r) for r in d.rows][0].__name__,
+                         '_LazyDictObject')
+
+    def test_lazy_from_json(self):
+        d = DictObject.create_from_dict(JSON_DATA, lazy=True, from_json=True)
+        self.check(d)
+        self.assertEqual(d.get('missing', 42), 42)
+        self.assertEqual(dict(d.items())['nested'].deep.value, 3)
+
+    def test_lazy_compare(self):
+        d = DictObject.create_from_dict(DATA, lazy=True)
+        self.assertEqual(d, JSON_DATA)
+        self.assertEqual(json.loads(json.dumps(
+            DictObject.create_from_dict(DATA, lazy=True))), JSON_DATA)
+
+    def test_lazy_list_methods(self):
+        d = DictObject.create_from_dict(DATA, lazy=True)
+        rows = d.rows
+        self.assertIsInstance(next(reversed(rows)), str)
+        self.assertIsInstance(list(reversed(rows))[2], DictObject)
+        self.assertEqual(rows.index('y'), 2)
+        self.assertEqual(rows.index({'a': 1}), 0)
+        self.assertRaises(ValueError, rows.index, 'y', 0, 2)
+        self.assertIn('y', rows)
+        self.assertEqual(rows.count([{'b': 'x'}]), 1)
+        self.assertEqual(rows.pop(), 'y')
+        self.assertIsInstance(rows.pop(0), DictObject)
+        rows.remove([{'b': 'x'}])
+        self.assertEqual(rows, [])
+
+    def test_dict_subclasses(self):
+        data = OrderedDict([('a', OrderedDict([('b', 1)])),
+                            ('c', [OrderedDict([('d', 2)])])])
+        for kwargs in ({'from_json': True}, {'lazy': True},
+                       {'lazy': True, 'from_json': True}):
+            d = DictObject.create_from_dict(data, **kwargs)
+            self.assertIsInstance(d.a, DictObject)
+            self.assertEqual(d.a.b, 1)
+            self.assertEqual(d.c[0].d, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+# Copyright (c) 2019 Riverbed Technology, Inc.
+#
+# This software is licensed under the terms and conditions of the MIT License
+# accompanying the software ("License").  This software is distributed "AS IS"
+# as set forth in the License.
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import datetime
+from array import array
+
+from steelscript.common import export
+from steelscript.common.datastructures import ResultTable
+
+
+HEADERS = ['host', 'bytes', 'rate']
+ROWS = [['a', 10, 0.5], ['b', 20, 1.5], ['c', 30, None]]
+
+
+class ExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def test_guess_format(self):
+        self.assertEqual(export.guess_format('x.csv.gz'), 'csv')
+        self.assertEqual(export.guess_format('x.PARQUET'), 'parquet')
+        self.assertEqual(export.guess_format('x.cols'), 'columns')
+        self.assertRaises(ValueError, export.guess_format, 'x.txt')
+
+    def test_columns(self):
+        path = self.path('t.cols')
+        count = export.write_table(iter(ROWS), path, headers=HEADERS,
+                                   batch_size=2)
+        self.assertEqual(count, 3)
+
+        table = export.read_table(path)
+        self.assertEqual(table.columns, HEADERS)
+        self.assertEqual(table.column('bytes'), array('q', [10, 20, 30]))
+        # the second batch has a None, so the column becomes a list
+        self.assertEqual(table.column('rate'), [0.5, 1.5, None])
+        self.assertEqual([r.values() for r in table], ROWS)
+
+    def test_columns_file_object(self):
+        when = datetime.datetime(2020, 1, 2, 3, 4, 5)
+        data = ResultTable.from_rows([{'t': when, 'n': 1}])
+        out = io.BytesIO()
+        export.write_table(data, out, format='columns')
+        out.seek(0)
+        table = export.read_table(out, format='columns')
+        self.assertEqual(table.to_dicts(),
+                         [{'t': '2020-01-02 03:04:05', 'n': 1}])
+
+    def test_empty(self):
+        out = io.BytesIO()
+        self.assertEqual(export.write_table([], out, format='columns',
+                                            headers=HEADERS), 0)
+        out.seek(0)
+        table = export.read_table(out, format='columns')
+        self.assertEqual((table.columns, len(table)), (HEADERS, 0))
+
+    def test_csv(self):
+        out = io.StringIO()
+        rows = [dict(zip(HEADERS, row)) for row in ROWS]
+        self.assertEqual(export.write_table(rows, out, format='csv'), 3)
+        self.assertEqual(out.getvalue().splitlines(),
+                         ['host,bytes,rate', 'a,10,0.5', 'b,20,1.5', 'c,30,'])
+
+    def test_unknown(self):
+        self.assertRaises(ValueError, export.write_table, ROWS,
+                          io.BytesIO(), format='xls', headers=HEADERS)
+
+    @unittest.skipIf(export.pyarrow is not None, 'pyarrow is installed')
+    def test_requires_pyarrow(self):
+        self.assertNotIn('parquet', export.available_formats())
+        self.assertRaises(ImportError, export.write_table, ROWS,
+                          self.path('t.parquet'), headers=HEADERS)
+
+    @unittest.skipIf(export.pyarrow is None, 'pyarrow is not installed')
+    def test_arrow_formats(self):
+        for name in ('t.arrow', 't.feather', 't.parquet'):
+            path = self.path(name)
+            export.write_table(iter(ROWS), path, headers=HEADERS,
+                               batch_size=2)
+            table = export.read_table(path)
+            self.assertEqual([r.values() for r in table], ROWS)
+
+    @unittest.skipIf(export.pyarrow is None, 'pyarrow is not installed')
+    def test_arrow_types_across_batches(self):
+        # None and ints come first, floats and strings in later batches
+        rows = [[None, None], [1, None], [2.5, 'x'], [3, None], [4, 'y']]
+        for name in ('t.arrow', 't.parquet'):
+            path = self.path(name)
+            self.assertEqual(export.write_table(rows, path,
+                                                headers=['n', 's'],
+                                                batch_size=2), 5)
+            table = export.read_table(path)
+            self.assertEqual(table.column('n'), [None, 1.0, 2.5, 3.0, 4.0])
+            self.assertEqual(table.column('s'),
+                             [None, None, 'x', None, 'y'])
+
+    @unittest.skipIf(export.pyarrow is None, 'pyarrow is not installed')
+    def test_arrow_schema(self):
+        pyarrow = export.pyarrow
+        schema = pyarrow.schema([('n', pyarrow.float64()),
+                                 ('s', pyarrow.string())])
+        out = io.BytesIO()
+        export.write_table([[1, None], [2.5, 'x']], out, format='arrow',
+                           headers=['n', 's'], batch_size=1, schema=schema)
+        out.seek(0)
+        table = export.read_table(out, format='arrow')
+        self.assertEqual(table.to_dicts(), [{'n': 1.0, 's': None},
+                                            {'n': 2.5, 's': 'x'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+# Copyright (c) 2019 Riverbed Technology, Inc.
+#
+# This software is licensed under the terms and conditions of the MIT License
+# accompanying the software ("License").  This software is distributed "AS IS"
+# as set forth in the License.
+
+import socket
+import asyncio
+import unittest
+
+from steelscript.common.healthcheck import sweep_async
+
+
+def unused_port():
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.bind(('127.0.0.1', 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+class HealthCheckTests(unittest.TestCase):
+
+    def test_sweep(self):
+        async def handle(reader, writer):
+            await reader.readline()
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n')
+            await writer.drain()
+            writer.close()
+
+        async def run():
+            server = await asyncio.start_server(handle, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                return await sweep_async(
+                    ['127.0.0.1:%d' % port, ('127.0.0.1', unused_port())],
+                    tls=False, timeout=2)
+
+        up, down = asyncio.run(run())
+
+        self.assertTrue(up.ok)
+        self.assertTrue(up.reachable)
+        self.assertEqual(up.status, 200)
+        self.assertIsNotNone(up.ping)
+
+        self.assertFalse(down.ok)
+        self.assertFalse(down.reachable)
+        self.assertTrue(down.error.startswith('TCP connect'))
+
+
+if __name__ == '__main__':
+    unittest.main()
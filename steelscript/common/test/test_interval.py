@@ -5,7 +5,7 @@
 # as set forth in the License.
 
 import unittest
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 from steelscript.common import Interval, IntervalList
 
@@ -109,5 +109,144 @@ class IntervalTests(unittest.TestCase):
         res = IntervalList([Interval(1, 3), Interval(5, 6)])
         self.assertEqual(res, iv.intersection(ivl))
 
+    def test_set_operations(self):
+        a = IntervalList([Interval(0, 3), Interval(5, 8), Interval(10, 10)])
+        b = IntervalList([Interval(2, 6), Interval(8, 9), Interval(10, 12)])
+
+        self.assertEqual(a | b, IntervalList([Interval(0, 9),
+                                              Interval(10, 12)]))
+        self.assertEqual(a & b, IntervalList([Interval(2, 3),
+                                              Interval(5, 6),
+                                              Interval(10, 10)]))
+        self.assertEqual(a - b, IntervalList([Interval(0, 2),
+                                              Interval(6, 8)]))
+        self.assertEqual(a ^ b, IntervalList([Interval(0, 2),
+                                              Interval(3, 5),
+                                              Interval(6, 9),
+                                              Interval(10, 12)]))
+        self.assertEqual(a & b, a - (a - b))
+        self.assertEqual(a.union(Interval(3, 5)),
+                         IntervalList([Interval(0, 8), Interval(10, 10)]))
+
+    def test_set_operations_large(self):
+        a = IntervalList([Interval(i * 10, i * 10 + 5)
+                          for i in range(5000)])
+        b = IntervalList([Interval(i * 10 + 3, i * 10 + 8)
+                          for i in range(0, 5000, 2)])
+        self.assertEqual(len(a - b), 5000)
+        self.assertEqual(len(a & b), 2500)
+        self.assertEqual(len(a | b), 5000)
+
+    def test_queries(self):
+        ints = IntervalList([Interval(0, 3), Interval(5, 8), Interval(10, 12)])
+        self.assertTrue(ints.contains(Interval(5, 6)))
+        self.assertFalse(Interval(2, 6) in ints)
+        self.assertEqual(ints.covering(8), Interval(5, 8))
+        self.assertIsNone(ints.covering(4))
+        self.assertIsNone(ints.covering(-1))
+        self.assertEqual(ints.overlapping(Interval(3, 10)),
+                         [Interval(0, 3), Interval(5, 8), Interval(10, 12)])
+        self.assertEqual(ints.overlapping(Interval(4, 4)), [])
+        self.assertEqual(ints.gaps(),
+                         IntervalList([Interval(3, 5), Interval(8, 10)]))
+        self.assertEqual(ints.gaps(Interval(2, 14)),
+                         IntervalList([Interval(3, 5), Interval(8, 10),
+                                       Interval(12, 14)]))
+
+        ints.append(Interval(20, 25))
+        self.assertEqual(ints.covering(21), Interval(20, 25))
+
+    def test_add_in_place(self):
+        ints = IntervalList([])
+        for start in (10, 0, 20, 4, 30):
+            ints.add(Interval(start, start + 2))
+        self.assertEqual(ints, IntervalList([Interval(0, 2), Interval(4, 6),
+                                             Interval(10, 12),
+                                             Interval(20, 22),
+                                             Interval(30, 32)]))
+        ints.add(Interval(5, 20))
+        self.assertEqual(ints, IntervalList([Interval(0, 2), Interval(4, 22),
+                                             Interval(30, 32)]))
+        ints.add(Interval(2.5, 3.5))
+        self.assertEqual(len(ints), 4)
+        self.assertEqual(ints[1], Interval(2.5, 3.5))
+
+    def test_datetime_storage(self):
+        dt1 = datetime(2016, 5, 18, 13, 0, 0, 5)
+        dt2 = datetime(2016, 5, 18, 14)
+        ints = IntervalList([Interval(dt1, dt2)])
+        self.assertTrue(Interval(dt2, dt2) in ints)
+        self.assertEqual(ints._starts.typecode, 'q')
+        self.assertEqual(ints[0], Interval(dt1, dt2))
+        self.assertRaises(AttributeError, setattr, ints[0], 'other', 1)
+
+    def test_intervals_list(self):
+        ints = IntervalList([Interval(0, 2)])
+        ints.intervals.append(Interval(5, 6))
+        self.assertEqual(len(ints), 2)
+        self.assertEqual(ints.covering(5), Interval(5, 6))
+        ints.intervals = [Interval(3, 4)]
+        self.assertFalse(Interval(0, 1) in ints)
+        self.assertTrue(Interval(3, 4) in ints)
+
+    def test_interval_objects_kept(self):
+        class Labeled(Interval):
+            pass
+
+        first, second = Labeled(0, 2), Labeled(4, 6)
+        first.label, second.label = 'first', 'second'
+        ints = IntervalList([second, first])
+        self.assertTrue(ints[0] is first)
+        self.assertEqual([i.label for i in ints], ['first', 'second'])
+        self.assertTrue(ints.covering(5) is second)
+        ints.add(Interval(5, 8))
+        self.assertEqual(ints[1].__class__, Labeled)
+        self.assertEqual(ints[1], Interval(4, 8))
+
+    def test_aware_datetimes_kept(self):
+        east = timezone(timedelta(hours=5))
+        west = timezone(timedelta(hours=-5))
+        itv1 = Interval(datetime(2020, 1, 1, 10, tzinfo=east),
+                        datetime(2020, 1, 1, 11, tzinfo=east))
+        itv2 = Interval(datetime(2020, 1, 1, 10, tzinfo=west),
+                        datetime(2020, 1, 1, 11, tzinfo=west))
+        ints = IntervalList([itv2, itv1])
+        self.assertEqual([i.start.tzinfo for i in ints], [east, west])
+        self.assertTrue(ints.covering(itv2.start) is itv2)
+
+    def test_split(self):
+        ints = IntervalList([Interval(5, 12), Interval(15, 31),
+                             Interval(40, 40)])
+        self.assertEqual(list(ints.split(10)),
+                         [Interval(0, 10), Interval(10, 20), Interval(20, 30),
+                          Interval(30, 40), Interval(40, 50)])
+        self.assertEqual(list(IntervalList([Interval(5, 12)]).split(
+            10, align=False)), [Interval(5, 15)])
+
+        start = datetime(2020, 1, 1, 10, 17)
+        ints = IntervalList([Interval(start, datetime(2020, 1, 1, 12, 5))])
+        self.assertEqual([b.start.hour for b in ints.split('1 hour')],
+                         [10, 11, 12])
+        self.assertEqual([b.start.minute for b in ints.split(
+            timedelta(minutes=45), align='day')], [45, 30, 15, 0])
+
+        # aligning to a unit keeps aware datetimes aware
+        tz = timezone(timedelta(hours=5, minutes=30))
+        ints = IntervalList([Interval(start.replace(tzinfo=tz),
+                                      datetime(2020, 1, 1, 12, 5, tzinfo=tz))])
+        self.assertEqual([b.start for b in ints.split('1 hour', align='day')],
+                         [datetime(2020, 1, 1, h, tzinfo=tz)
+                          for h in (10, 11, 12)])
+
+    def test_coverage(self):
+        cached = IntervalList([Interval(datetime(2020, 1, 1, 10),
+                                        datetime(2020, 1, 1, 12))])
+        query = Interval(datetime(2020, 1, 1, 9, 30),
+                         datetime(2020, 1, 1, 13, 30))
+        covered, missing = cached.coverage(query, timedelta(hours=1))
+        self.assertEqual([b.start.hour for b in covered], [10, 11])
+        self.assertEqual([b.start.hour for b in missing], [9, 12, 13])
+
+
 if __name__ == '__main__':
     unittest.main()
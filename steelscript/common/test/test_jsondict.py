@@ -5,10 +5,15 @@
 # as set forth in the License.
 
 
-from steelscript.common.datastructures import JsonDict
+from steelscript.common.datastructures import (JsonDict, LazyJsonDict,
+                                               _ClassDefaults)
 
+import gc
+import abc
+import weakref
 import unittest
 import logging
+from collections import OrderedDict
 
 
 logger = logging.getLogger(__name__)
@@ -152,5 +157,132 @@ class JsonDictTest(unittest.TestCase):
         self.assertEqual(w.size.width, 100)
         self.assertEqual(w.size.height, 200)
 
+    def test_class_default_copies(self):
+        class Widget(JsonDict):
+            _default = {'name': None,
+                        'size': {'width': 100,
+                                 'height': 200},
+                        'tags': ['a']}
+
+        w1 = Widget(name='Box')
+        w2 = Widget(name='Rect')
+        w1.size.width = 150
+        w1.tags.append('b')
+        self.assertEqual(w2.size.width, 100)
+        self.assertEqual(w2.tags, ['a'])
+        self.assertRaises(AttributeError, setattr, w2.size, 'depth', 1)
+
+    def test_class_default_inherited(self):
+        class Widget(JsonDict):
+            _default = {'name': None, 'width': 100}
+
+        class Box(Widget):
+            _default = {'height': 200}
+
+        b = Box(name='Box')
+        self.assertEqual(b, {'name': 'Box', 'width': 100, 'height': 200})
+
+        Widget._default = {'name': None, 'width': 50}
+        self.assertEqual(Box().width, 50)
+        Box._default = {'height': 10}
+        self.assertEqual(Box().height, 10)
+
+    def test_class_default_cached(self):
+        class Widget(JsonDict):
+            _default = {'name': None}
+
+        defaults = _ClassDefaults.get(Widget)
+        Widget(name='Box')
+        self.assertIs(_ClassDefaults.get(Widget), defaults)
+
+        del Widget._default
+        self.assertEqual(Widget(), {})
+
+    def test_class_default_not_kept_alive(self):
+        class Widget(JsonDict):
+            _default = {'name': None}
+
+        Widget(name='Box')
+        ref = weakref.ref(Widget)
+        del Widget
+        gc.collect()
+        self.assertIsNone(ref())
+
+    def test_class_default_abc(self):
+        class Shape(JsonDict, metaclass=abc.ABCMeta):
+            _default = {'name': None}
+
+            @abc.abstractmethod
+            def area(self):
+                pass
+
+        class Square(Shape):
+            _default = {'side': 1}
+
+            def area(self):
+                return self.side ** 2
+
+        self.assertTrue(issubclass(Square, Shape))
+        self.assertEqual(Square(name='sq', side=3).area(), 9)
+
+    def test_class_setattr_override(self):
+        class Upper(JsonDict):
+            def __setattr__(self, key, value):
+                if isinstance(value, str):
+                    value = value.upper()
+                super(Upper, self).__setattr__(key, value)
+
+        self.assertEqual(Upper({'a': 'x'}).a, 'X')
+
+    def test_special_keys(self):
+        j = JsonDict({'name__first': 'John', '_private': 1,
+                      'rows': [{'a': b'x'}, [{'b': 2}], 3]})
+        self.assertEqual(j.name.first, 'John')
+        self.assertEqual(j._private, 1)
+        self.assertNotIn('_private', j)
+        self.assertEqual(j.rows[0].a, 'x')
+        self.assertEqual(j.rows[1][0].b, 2)
+        self.assertEqual(j.rows[2], 3)
+        self.assertNotIn('_default', j.__dict__)
+
+
+class LazyJsonDictTest(unittest.TestCase):
+
+    def test_lazy(self):
+        data = {'name': {'first': 'John'},
+                'rows': [{'a': 1}, {'a': 2}, [{'b': 3}]]}
+        j = LazyJsonDict(data)
+        self.assertEqual(j, data)
+        self.assertIs(type(dict.__getitem__(j, 'name')), dict)
+
+        self.assertEqual(j.name.first, 'John')
+        self.assertIsInstance(j.name, LazyJsonDict)
+        self.assertIs(j.name, j['name'])
+
+        self.assertEqual(j.rows[1].a, 2)
+        self.assertEqual(j.rows__2__0__b, 3)
+        self.assertEqual([r.a for r in j.rows[:2]], [1, 2])
+        self.assertEqual(j.get('missing', 42), 42)
+        self.assertEqual(dict(j.items())['name'].first, 'John')
+
+    def test_lazy_list_methods(self):
+        j = LazyJsonDict({'rows': [{'a': 1}, {'a': 2}, {'a': 3}]})
+        self.assertEqual([r.a for r in reversed(j.rows)], [3, 2, 1])
+        self.assertEqual(j.rows.index({'a': 2}), 1)
+        self.assertIsInstance(j.rows.pop(), LazyJsonDict)
+        self.assertEqual(j.rows.pop(0).a, 1)
+        self.assertEqual(j.rows, [{'a': 2}])
+
+    def test_dict_subclasses(self):
+        j = LazyJsonDict({'a': OrderedDict([('b', 1)])})
+        self.assertIsInstance(j.a, LazyJsonDict)
+        self.assertEqual(j.a.b, 1)
+
+    def test_loads(self):
+        j = LazyJsonDict.loads('{"a": {"b": [1, {"c": 2}]}}')
+        self.assertEqual(j.a.b[1].c, 2)
+        self.assertEqual(str(j), '{"a": {"b": [1, {"c": 2}]}}')
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,126 @@
+# Copyright (c) 2019 Riverbed Technology, Inc.
+#
+# This software is licensed under the terms and conditions of the MIT License
+# accompanying the software ("License").  This software is distributed "AS IS"
+# as set forth in the License.
+
+import asyncio
+import itertools
+import unittest
+
+from steelscript.common.polling import (do_poll, async_do_poll, PollSchedule,
+                                        CompletionStats, Poller, poll_async)
+from steelscript.common.exceptions import RvbdTimeoutException
+
+
+class Counter(object):
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self):
+        self.count += 1
+        return self.count
+
+
+class DoPollTests(unittest.TestCase):
+
+    def test_do_poll(self):
+        c = Counter()
+        results = list(do_poll(c, max_poll_retries=3, min_poll_interval=0))
+        self.assertEqual(results, [1, 2, 3])
+
+    def test_async_do_poll(self):
+        c = Counter()
+
+        async def coro():
+            return c()
+
+        async def collect(func, **kwargs):
+            return [x async for x in async_do_poll(func, **kwargs)]
+
+        self.assertEqual(asyncio.run(collect(coro, max_poll_retries=3,
+                                             min_poll_interval=0.001)),
+                         [1, 2, 3])
+        self.assertEqual(asyncio.run(collect(c, max_poll_retries=2,
+                                             min_poll_interval=0)),
+                         [4, 5])
+
+    def test_async_do_poll_timeout(self):
+        async def wait():
+            async for x in async_do_poll(Counter(), min_poll_interval=10):
+                pass
+
+        self.assertRaises(asyncio.TimeoutError, asyncio.run,
+                          asyncio.wait_for(wait(), 0.05))
+
+
+class PollScheduleTests(unittest.TestCase):
+
+    def test_backoff(self):
+        s = PollSchedule(min_interval=1, max_interval=5, backoff=2)
+        self.assertEqual(list(itertools.islice(s.delays(), 6)),
+                         [0, 1, 2, 4, 5, 5])
+
+    def test_expected(self):
+        stats = CompletionStats()
+        stats.add('job', 10)
+        s = stats.schedule('job', min_interval=1, max_interval=30)
+        self.assertEqual(s.first_delay(), 8)
+        self.assertEqual(stats.schedule('other').first_delay(), 0)
+
+
+class PollerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.poller = Poller(max_workers=4)
+        self.addCleanup(self.poller.close)
+
+    def test_many(self):
+        schedule = PollSchedule(min_interval=0.001, max_interval=0.01)
+        counters = [Counter() for i in range(200)]
+        futures = [self.poller.submit(c, until=lambda n: n >= 3,
+                                      schedule=schedule, name='count')
+                   for c in counters]
+        self.assertEqual([f.result(5) for f in futures], [3] * 200)
+        self.assertIsNotNone(self.poller.stats.get('count'))
+
+    def test_deadline(self):
+        schedule = PollSchedule(min_interval=0.01, max_interval=0.01)
+        f = self.poller.submit(Counter(), until=lambda n: False,
+                               schedule=schedule, deadline=0.05)
+        self.assertRaises(RvbdTimeoutException, f.result, 5)
+
+    def test_exception(self):
+        def fail():
+            raise ValueError('failed')
+
+        f = self.poller.submit(fail)
+        self.assertRaises(ValueError, f.result, 5)
+
+
+class PollAsyncTests(unittest.TestCase):
+
+    def test_poll_async(self):
+        schedule = PollSchedule(min_interval=0.001, max_interval=0.01)
+
+        async def coro(c):
+            return c()
+
+        async def run():
+            return await asyncio.gather(
+                poll_async(coro, Counter(), until=lambda n: n == 4,
+                           schedule=schedule),
+                poll_async(Counter(), until=lambda n: n == 2,
+                           schedule=schedule))
+
+        self.assertEqual(asyncio.run(run()), [4, 2])
+
+    def test_deadline(self):
+        schedule = PollSchedule(min_interval=0.01, max_interval=0.01)
+        coro = poll_async(Counter(), until=lambda n: False,
+                          schedule=schedule, deadline=0.05)
+        self.assertRaises(RvbdTimeoutException, asyncio.run, coro)
+
+
+if __name__ == '__main__':
+    unittest.main()
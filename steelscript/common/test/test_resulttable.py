@@ -0,0 +1,114 @@
+# Copyright (c) 2019 Riverbed Technology, Inc.
+#
+# This software is licensed under the terms and conditions of the MIT License
+# accompanying the software ("License").  This software is distributed "AS IS"
+# as set forth in the License.
+
+import unittest
+from array import array
+
+from steelscript.common.datastructures import ResultTable, DictObject
+
+
+ROWS = [{'host': 'a', 'bytes': 30, 'rtt': 1.5},
+        {'host': 'b', 'bytes': 10, 'rtt': 2},
+        {'host': 'a', 'bytes': 20, 'rtt': 0.5}]
+
+
+class ResultTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = ResultTable.from_rows(ROWS)
+
+    def test_columns(self):
+        t = self.table
+        self.assertEqual(len(t), 3)
+        self.assertEqual(t.columns, ['host', 'bytes', 'rtt'])
+        self.assertEqual(t.column('bytes'), array('q', [30, 10, 20]))
+        self.assertEqual(t.column('rtt'), array('d', [1.5, 2.0, 0.5]))
+        self.assertEqual(t.column('host'), ['a', 'b', 'a'])
+
+    def test_rows(self):
+        row = self.table[1]
+        self.assertEqual(row.host, 'b')
+        self.assertEqual(row['bytes'], 10)
+        self.assertEqual(row[0], 'b')
+        self.assertEqual(self.table[-1].bytes, 20)
+        self.assertRaises(AttributeError, getattr, row, 'missing')
+        self.assertEqual(row, {'host': 'b', 'bytes': 10, 'rtt': 2.0})
+        self.assertIsInstance(row.to_dict(), DictObject)
+        self.assertEqual(self.table.to_dicts(), ROWS)
+
+    def test_list_rows(self):
+        t = ResultTable.from_rows([['a', 1], ['b', 2]],
+                                  columns=['host', 'count'])
+        self.assertEqual(t.column('count'), array('q', [1, 2]))
+        self.assertRaises(ValueError, ResultTable.from_rows, [['a', 1]])
+
+    def test_empty(self):
+        t = ResultTable.from_rows([])
+        self.assertEqual((t.columns, len(t)), ([], 0))
+        t = ResultTable.from_rows(iter([]), columns=['host', 'bytes'])
+        self.assertEqual((t.columns, len(t)), (['host', 'bytes'], 0))
+
+        t.append({'host': 'a', 'bytes': 10})
+        t.append(['b', 20])
+        self.assertEqual(t.column('bytes'), array('q', [10, 20]))
+        self.assertEqual(t.column('host'), ['a', 'b'])
+
+    def test_append(self):
+        t = self.table
+        t.append({'host': 'c', 'bytes': None, 'rtt': 1.0})
+        t.append(['d', 5, 2.5])
+        self.assertEqual(len(t), 5)
+        self.assertEqual(t.column('bytes'), [30, 10, 20, None, 5])
+        self.assertEqual(t.column('rtt').typecode, 'd')
+
+    def test_append_with_view(self):
+        t = ResultTable.from_rows([['a', 1, 1.5]],
+                                  columns=['host', 'bytes', 'rtt'])
+        view = memoryview(t.column('rtt'))
+        t.append(['b', 2, 'slow'])
+        t.append(['c', 3, 2.5])
+        self.assertEqual(len(t.column('bytes')), 3)
+        self.assertEqual(t.column('rtt'), [1.5, 'slow', 2.5])
+
+        view = memoryview(t.column('bytes'))
+        t.append(['d', 4, 3.5])
+        self.assertEqual(t.column('bytes'), array('q', [1, 2, 3, 4]))
+        self.assertEqual(view.tolist(), [1, 2, 3])
+        self.assertEqual([len(t.column(c)) for c in t.columns], [4, 4, 4])
+
+    def test_filter(self):
+        t = self.table.filter(host='a')
+        self.assertEqual(t.column('bytes'), array('q', [30, 20]))
+        t = self.table.filter(bytes=lambda b: b < 25, host='a')
+        self.assertEqual(t.to_dicts(), [ROWS[2]])
+        t = self.table.filter(mask=[True, False, True])
+        self.assertEqual(len(t), 2)
+
+    def test_sort(self):
+        t = self.table.sort('bytes')
+        self.assertEqual(t.column('bytes'), array('q', [10, 20, 30]))
+        t = self.table.sort('host', 'rtt', reverse=True)
+        self.assertEqual(t.column('rtt'), array('d', [2.0, 1.5, 0.5]))
+
+    def test_sort_none(self):
+        t = ResultTable.from_rows([{'host': 'b', 'bytes': 2},
+                                   {'bytes': 1},
+                                   {'host': 'a', 'bytes': None}])
+        self.assertEqual(t.sort('host').column('host'), [None, 'a', 'b'])
+        self.assertEqual(t.sort('host', reverse=True).column('host'),
+                         ['b', 'a', None])
+        self.assertEqual(t.sort('bytes', 'host').column('bytes'),
+                         [None, 1, 2])
+
+    def test_group_by(self):
+        groups = self.table.group_by('host')
+        self.assertEqual(list(groups), ['a', 'b'])
+        self.assertEqual(groups['a'].column('bytes'), array('q', [30, 20]))
+        self.assertEqual(len(groups['b']), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
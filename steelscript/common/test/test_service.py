@@ -0,0 +1,140 @@
+# Copyright (c) 2019 Riverbed Technology, Inc.
+#
+# This software is licensed under the terms and conditions of the MIT License
+# accompanying the software ("License").  This software is distributed "AS IS"
+# as set forth in the License.
+
+import unittest
+
+import mock
+
+from steelscript.common.service import Service
+from steelscript.common.api_helpers import APIVersion
+from steelscript.common.exceptions import RvbdException, RvbdHTTPException
+
+
+SERVICES = [{'id': 'other', 'versions': ['1.0']},
+            {'id': 'fake', 'versions': ['1.0', '1.1', '2.0']}]
+
+
+def make_service(host='fakehost'):
+    with mock.patch.object(Service, 'connect'):
+        svc = Service('fake', host=host,
+                      enable_services_version_detection=False)
+    svc.conn = mock.Mock()
+    svc.conn.json_request.return_value = SERVICES
+    return svc
+
+
+class APIVersionTests(unittest.TestCase):
+
+    def test_hash(self):
+        a, b = APIVersion('1.1'), APIVersion('1.1')
+        self.assertEqual(hash(a), hash(b))
+        self.assertEqual(len({a, b, APIVersion('2.0')}), 2)
+        self.assertEqual(a.key, (1, 1))
+        self.assertNotEqual(a, '1.1')
+
+
+class APIVersionCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        Service.clear_api_version_cache()
+        self.addCleanup(Service.clear_api_version_cache)
+
+    def test_negotiate(self):
+        svc = make_service()
+        self.assertTrue(svc.check_api_versions([APIVersion('3.0'),
+                                                APIVersion('1.1')]))
+        self.assertEqual(svc.api_version, APIVersion('1.1'))
+        self.assertEqual(Service.lookup_api_version('fakehost', 'fake'),
+                         APIVersion('1.1'))
+        self.assertIsNone(Service.lookup_api_version('otherhost', 'fake'))
+
+        self.assertRaises(RvbdException, svc.check_api_versions, ['3.0'])
+
+    def test_cached_across_instances(self):
+        svc1 = make_service()
+        svc1.check_api_versions(['2.0'])
+
+        svc2 = make_service()
+        self.assertTrue(svc2.check_api_versions(['2.0']))
+        self.assertEqual(svc2.api_version, APIVersion('2.0'))
+        self.assertFalse(svc2.conn.json_request.called)
+
+        svc2.check_api_versions(['2.0'], refresh=True)
+        self.assertEqual(svc2.conn.json_request.call_count, 1)
+
+        svc3 = make_service(host='otherhost')
+        svc3.check_api_versions(['2.0'])
+        self.assertEqual(svc3.conn.json_request.call_count, 1)
+
+    def test_cached_list_not_shared(self):
+        svc1 = make_service()
+        svc1.check_api_versions(['2.0'])
+        supported = list(svc1.supported_versions)
+        svc1.supported_versions.clear()
+
+        svc2 = make_service()
+        self.assertTrue(svc2.check_api_versions(['2.0']))
+        self.assertEqual(svc2.supported_versions, supported)
+        self.assertIsNot(svc2.supported_versions, svc1.supported_versions)
+
+    def test_not_found_not_cached(self):
+        result = mock.Mock(status_code=404, reason='Not Found', headers={})
+        svc1 = make_service()
+        svc1.conn.json_request.side_effect = RvbdHTTPException(
+            result, '', 'GET', '/api/common/1.0/services')
+        self.assertFalse(svc1.check_api_versions(['2.0']))
+        self.assertIsNone(svc1.supported_versions)
+
+        svc2 = make_service()
+        self.assertTrue(svc2.check_api_versions(['2.0']))
+        self.assertEqual(svc2.conn.json_request.call_count, 1)
+
+
+class LazyServiceTests(unittest.TestCase):
+
+    def setUp(self):
+        Service.clear_api_version_cache()
+        self.addCleanup(Service.clear_api_version_cache)
+
+    def test_lazy(self):
+        def connect(svc):
+            svc.conn = mock.Mock()
+            svc.conn.json_request.return_value = SERVICES
+
+        with mock.patch.object(Service, 'connect', autospec=True,
+                               side_effect=connect) as m:
+            svc = Service('fake', host='fakehost', lazy=True,
+                          versions=[APIVersion('1.1')])
+            self.assertFalse(m.called)
+
+            conn = svc.conn
+            self.assertEqual(m.call_count, 1)
+            self.assertEqual(svc.api_version, APIVersion('1.1'))
+
+            self.assertIs(svc.conn, conn)
+            self.assertEqual(m.call_count, 1)
+
+    def test_lazy_background(self):
+        with mock.patch.object(Service, 'connect', autospec=True) as m:
+            svc = Service('fake', host='fakehost', lazy=True,
+                          enable_services_version_detection=False)
+            svc.initialize(background=True).join()
+            self.assertEqual(m.call_count, 1)
+            svc.conn
+            self.assertEqual(m.call_count, 1)
+
+    def test_lazy_retry(self):
+        with mock.patch.object(Service, 'connect', autospec=True,
+                               side_effect=[RvbdException('down'), None]):
+            svc = Service('fake', host='fakehost', lazy=True,
+                          enable_services_version_detection=False)
+            self.assertRaises(RvbdException, getattr, svc, 'conn')
+            svc.initialize()
+            self.assertTrue(svc._initialized)
+
+
+if __name__ == '__main__':
+    unittest.main()
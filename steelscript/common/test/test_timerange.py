@@ -10,7 +10,8 @@ from collections import OrderedDict
 
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
-from steelscript.common.timeutils import parse_range, parse_timedelta
+from steelscript.common.timeutils import (parse_range, parse_timedelta,
+                                         _parse_range_plan)
 
 
 class TimeRangeTests(unittest.TestCase):
@@ -162,3 +163,22 @@ class TimeRangeTests(unittest.TestCase):
         self.on_boundary(start, 'year')
         self.close_to_now(end)
         self.within_unit(start, 'year')
+
+    def test_absolute(self):
+        start, end = parse_range('5/10/2011 12:00 to 5/10/2011 13:30')
+        self.assertEqual(start, datetime(2011, 5, 10, 12))
+        self.assertEqual(end, datetime(2011, 5, 10, 13, 30))
+
+        start, end = parse_range('12:00,13:30')
+        self.assertEqual(start.date(), datetime.now().date())
+        self.assertEqual((start.hour, end.hour, end.minute), (12, 13, 30))
+
+        self.assertRaises(ValueError, parse_range, 'bogus')
+
+    def test_cached(self):
+        _parse_range_plan.cache_clear()
+        first = parse_range('last 1 hour')
+        second = parse_range(' last 1 hour ')
+        self.assertEqual(_parse_range_plan.cache_info().hits, 1)
+        self.assertEqual(second[1] - second[0], timedelta(hours=1))
+        self.assertTrue(second[1] >= first[1])
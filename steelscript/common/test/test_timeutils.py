@@ -0,0 +1,353 @@
+# Copyright (c) 2019 Riverbed Technology, Inc.
+#
+# This software is licensed under the terms and conditions of the MIT License
+# accompanying the software ("License").  This software is distributed "AS IS"
+# as set forth in the License.
+
+import os
+import time
+import calendar
+import datetime
+import unittest
+
+import mock
+import dateutil.tz
+
+from steelscript.common import timeutils
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class BulkConversionTest(unittest.TestCase):
+
+    def test_units(self):
+        base = datetime.datetime(2014, 1, 17, 23, 6, 40,
+                                 tzinfo=timeutils.tzutc())
+        self.assertEqual(timeutils.sec_strings_to_datetimes([1390000000]),
+                         [timeutils.sec_string_to_datetime(1390000000)])
+        self.assertEqual(
+            timeutils.msec_strings_to_datetimes(['1390000000123']),
+            [base.replace(microsecond=123000)])
+        self.assertEqual(
+            timeutils.usec_strings_to_datetimes(['1390000000123456']),
+            [base.replace(microsecond=123456)])
+        self.assertEqual(
+            timeutils.nsec_to_datetimes(['1390000000123456789']),
+            [base.replace(microsecond=123457)])
+
+    def test_fractions_and_zero(self):
+        self.assertEqual(
+            timeutils.epoch_to_datetimes([1.5, '2.25'], unit='s'),
+            [timeutils.sec_string_to_datetime(1.5),
+             timeutils.sec_string_to_datetime(2.25)])
+        self.assertEqual(timeutils.nsec_to_datetimes([0, '0', 1500]),
+                         [None, None, timeutils.nsec_to_datetime(1500)])
+        self.assertEqual(timeutils.epoch_to_datetimes([0])[0].year, 1970)
+
+    def test_nsec_rounding(self):
+        # float seconds round this down, the exact value rounds up
+        values = [1390000000123456504, -1500, 1] + [
+            1390000000000000000 + i * 987654321987 for i in range(1000)]
+        self.assertEqual(timeutils.nsec_to_datetimes(values),
+                         [timeutils.nsec_to_datetime(v) for v in values])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_datetime64(self):
+        def naive(dt):
+            return dt.replace(tzinfo=None)
+
+        for values in ([1390000000, 1.5, '2.25', '1390000000', 0],
+                       [1390000000.25, 1390000000.123456, -1.5]):
+            result = timeutils.epoch_to_datetimes(values, datetime64=True)
+            self.assertEqual(result.dtype, numpy.dtype('datetime64[ns]'))
+            self.assertEqual(
+                result.astype('datetime64[us]').tolist(),
+                [naive(timeutils.sec_string_to_datetime(float(v)))
+                 for v in values])
+
+        # the same times in each unit
+        ns = [1390000000123456000, 2000, 1500000000]
+        for unit, scale in (('ms', 10 ** 6), ('us', 10 ** 3), ('ns', 1)):
+            values = [v // scale for v in ns if v % scale == 0]
+            for given in (values, [str(v) for v in values]):
+                result = timeutils.epoch_to_datetimes(given, unit,
+                                                      datetime64=True)
+                self.assertEqual(
+                    result.astype('datetime64[us]').tolist(),
+                    [naive(timeutils.nsec_to_datetime(v * scale))
+                     for v in values], unit)
+
+        result = timeutils.nsec_to_datetimes([0, '0', 2000],
+                                             datetime64=True)
+        self.assertEqual(numpy.isnat(result).tolist(), [True, True, False])
+        self.assertEqual(result[2].astype('datetime64[us]').tolist(),
+                         naive(timeutils.nsec_to_datetime(2000)))
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_numpy_scalars(self):
+        values = numpy.array([1390000000, 0], dtype='int64')
+        self.assertEqual(timeutils.epoch_to_datetimes(list(values)),
+                         timeutils.epoch_to_datetimes([1390000000, 0]))
+        self.assertEqual(timeutils.nsec_to_datetimes(list(values)),
+                         [timeutils.nsec_to_datetime(1390000000), None])
+        self.assertEqual(
+            timeutils.epoch_to_datetimes([numpy.float32(1.5)]),
+            timeutils.epoch_to_datetimes([1.5]))
+
+
+class TimeParserShapeTest(unittest.TestCase):
+
+    SAMPLES = ['12:30', '12:30:45.123', '1:30 PM', '3pm', '5/10 12:30',
+               'May 10 1:30 pm', '12:00 2011/5/10', '5/10/11 13:00:01',
+               'January/10/2011 12:30', '12:30 5/ 3']
+
+    def brute_force(self, s):
+        for fmt in timeutils.TimeParser._formats:
+            try:
+                return fmt.match(s), fmt
+            except ValueError:
+                pass
+
+    def test_shape(self):
+        self.assertEqual(timeutils._shape('12:30 PM 5/10'), '0:0 a 0/0')
+
+    def test_same_format(self):
+        for s in self.SAMPLES:
+            dt, fmt = timeutils.TimeParser._parse_no_hint(s)
+            self.assertIs(fmt, self.brute_force(s)[1], s)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, timeutils.TimeParser.parse_one,
+                          '25:30')
+        self.assertRaises(ValueError, timeutils.TimeParser.parse_one,
+                          'not a time')
+
+
+class ParseManyTest(unittest.TestCase):
+
+    def test_parse_many(self):
+        strings = ['5/10/2011 12:30', '2011-05-11 1:00 pm', '13:15',
+                   '5/12/2011 12:30'] * 3
+        expected = [timeutils.TimeParser().parse(s) for s in strings]
+        parser = timeutils.TimeParser()
+        self.assertEqual(parser.parse_many(strings), expected)
+        self.assertEqual(parser._fmt.pattern, '%m/%d/%Y %H:%M')
+
+    def test_remembered_format(self):
+        parser = timeutils.TimeParser()
+        parser.parse('5/10/2011 12:30')
+        with mock.patch.object(timeutils.TimeParser, '_parse_no_hint',
+                               side_effect=AssertionError):
+            self.assertEqual(parser.parse_many(['5/11/2011 13:30']),
+                             [datetime.datetime(2011, 5, 11, 13, 30)])
+
+    def test_invalid(self):
+        parser = timeutils.TimeParser()
+        self.assertRaises(ValueError, parser.parse_many,
+                          ['12:30', 'bogus'])
+        self.assertEqual(parser._fmt.pattern, '%H:%M')
+
+    def test_processes(self):
+        strings = ['5/10/2011 12:%02d' % i for i in range(60)]
+        parser = timeutils.TimeParser()
+        self.assertEqual(parser.parse_many(strings, processes=2,
+                                           chunksize=25),
+                         parser.parse_many(strings))
+
+
+class FloorTest(unittest.TestCase):
+
+    def test_floor_dt(self):
+        dt = datetime.datetime(2016, 12, 14, 10, 14, 5, 10,
+                               tzinfo=timeutils.tzutc())
+        self.assertEqual(timeutils.floor_dt(dt, 'hour'),
+                         datetime.datetime(2016, 12, 14, 10))
+        self.assertEqual(timeutils.floor_dt(dt, 'fortnight'),
+                         datetime.datetime(2016, 12, 14, 10, 14, 5))
+        self.assertEqual(timeutils.floor_dt(dt, 'week').day, 11)
+        self.assertEqual(timeutils.floor_dt(dt, 'week', True).day, 12)
+        self.assertEqual(
+            timeutils.floor_dt(dt.replace(month=5, day=31), 'quarter'),
+            datetime.datetime(2016, 4, 1))
+
+    def test_floor_dt_keep_tzinfo(self):
+        dt = datetime.datetime(2016, 12, 14, 10, 14, 5, 10,
+                               tzinfo=timeutils.tzutc())
+        self.assertEqual(timeutils.floor_dt(dt, 'hour', keep_tzinfo=True),
+                         dt.replace(minute=0, second=0, microsecond=0))
+        self.assertEqual(timeutils.floor_dt(dt, 'quarter', keep_tzinfo=True),
+                         datetime.datetime(2016, 10, 1,
+                                           tzinfo=timeutils.tzutc()))
+        self.assertRaises(ValueError, timeutils.floor_dt, dt, 'fortnight',
+                          keep_tzinfo=True)
+
+    def test_round_time(self):
+        dt = datetime.datetime(2016, 12, 14, 10, 14, 40, 10,
+                               tzinfo=timeutils.tzutc())
+        self.assertEqual(timeutils.round_time(dt, 60, round_up=True),
+                         dt.replace(minute=15, second=0, microsecond=0))
+        self.assertEqual(timeutils.round_time(dt, 3600, trim=True),
+                         dt.replace(minute=0, second=0, microsecond=0))
+
+    def test_floor_timestamps(self):
+        tz = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+        values = [0, 1481710445, 1481710445.5, 1464566400]
+        for unit in ('minute', 'hour', 'day', 'week', 'month', 'quarter',
+                     'year'):
+            for zone in (None, tz, timeutils.tzlocal()):
+                expected = [timeutils.datetime_to_seconds(timeutils.floor_dt(
+                    datetime.datetime.fromtimestamp(
+                        v, zone or timeutils.tzutc()), unit,
+                    keep_tzinfo=True))
+                    for v in values]
+                self.assertEqual(
+                    timeutils.floor_timestamps(values, unit, tz=zone),
+                    expected, (unit, zone))
+
+        self.assertEqual(timeutils.floor_timestamps([125, 3599], 60),
+                         [120, 3540])
+        self.assertEqual(timeutils.floor_timestamps(
+            [125], datetime.timedelta(minutes=2)), [120])
+
+    @unittest.skipIf(dateutil.tz.gettz('America/St_Johns') is None,
+                     'no timezone database')
+    def test_floor_timestamps_fall_back(self):
+        # clocks go back from 2:00 NDT to 1:00 NST at 04:30 UTC, so the
+        # offset changes within a UTC hour and 1:00-2:00 is repeated
+        tz = dateutil.tz.gettz('America/St_Johns')
+        transition = 1636259400
+        values = list(range(transition - 7200, transition + 7200, 61))
+        for unit in ('minute', 'hour', 'day', 'week'):
+            expected = [timeutils.datetime_to_seconds(timeutils.floor_dt(
+                datetime.datetime.fromtimestamp(v, tz), unit,
+                keep_tzinfo=True)) for v in values]
+            self.assertEqual(timeutils.floor_timestamps(values, unit, tz=tz),
+                             expected, unit)
+
+        # 1:00 NST, the second 1:00 of the day
+        self.assertEqual(timeutils.floor_timestamps([transition], 'hour',
+                                                    tz=tz), [transition])
+        self.assertEqual(timeutils.floor_timestamps([transition - 1], 'hour',
+                                                    tz=tz), [transition - 3600])
+
+    @unittest.skipIf(dateutil.tz.gettz('Europe/London') is None,
+                     'no timezone database')
+    def test_floor_timestamps_skipped(self):
+        # clocks went forward from 1:00 GMT to 2:00 BST, so the bucket
+        # that would start at 1:30 starts at the transition
+        tz = dateutil.tz.gettz('Europe/London')
+        transition = 354675600
+        self.assertEqual(timeutils.floor_timestamps(
+            [transition - 1, transition + 60], 5400, tz=tz),
+            [transition - 3600, transition])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    @unittest.skipIf(dateutil.tz.gettz('America/St_Johns') is None,
+                     'no timezone database')
+    def test_floor_timestamps_arrays(self):
+        # St Johns and Adelaide have half hour offsets and repeat an
+        # hour after the transition, London skips 1:00-2:00
+        cases = [('America/St_Johns', 1636259400),
+                 ('Europe/London', 354675600),
+                 ('Australia/Adelaide', 1617467400)]
+        for name, transition in cases:
+            tz = dateutil.tz.gettz(name)
+            values = list(range(transition - 7200, transition + 7200, 61))
+            values = values[:len(values) // 4 * 4]
+            for step in ('minute', 'hour', 'day', 'week', 'month', 900,
+                         5400):
+                expected = timeutils.floor_timestamps(values, step, tz=tz)
+                for shape in ((len(values),), (4, len(values) // 4)):
+                    result = timeutils.floor_timestamps(
+                        numpy.array(values, dtype='int64').reshape(shape),
+                        step, tz=tz)
+                    self.assertEqual(result.shape, shape)
+                    self.assertEqual(result.ravel().tolist(), expected,
+                                     (name, step))
+
+            for step in (60, 3600, 5400):
+                self.assertEqual(timeutils.round_timestamps(
+                    numpy.array(values), step, tz=tz).tolist(),
+                    timeutils.round_timestamps(values, step, tz=tz),
+                    (name, step))
+                halves = [v + 0.5 for v in values]
+                self.assertEqual(timeutils.round_timestamps(
+                    numpy.array(halves), step, tz=tz).tolist(),
+                    timeutils.round_timestamps(halves, step, tz=tz),
+                    (name, step))
+
+    def test_round_timestamps(self):
+        self.assertEqual(timeutils.round_timestamps([89, 90, 91], 60),
+                         [60, 120, 120])
+        self.assertEqual(timeutils.round_timestamps([1, 2], 3), [0, 3])
+        self.assertEqual(timeutils.round_timestamps([29.5], '1 min'), [0])
+        self.assertRaises(ValueError, timeutils.round_timestamps, [1],
+                          'month')
+
+
+class TZLocalTest(unittest.TestCase):
+
+    def setUp(self):
+        old = os.environ.get('TZ')
+
+        def restore():
+            if old is None:
+                del os.environ['TZ']
+            else:
+                os.environ['TZ'] = old
+            time.tzset()
+
+        self.addCleanup(restore)
+        os.environ['TZ'] = 'America/New_York'
+        time.tzset()
+        if time.tzname[0] != 'EST':
+            self.skipTest('timezone database not available')
+
+    def test_isdst(self):
+        tz = timeutils.tzlocal()
+        start = datetime.datetime(2021, 3, 14)
+        for hours in range(-48, 48):
+            dt = start + datetime.timedelta(hours=hours, minutes=30)
+            timestamp = calendar.timegm(dt.timetuple())
+            self.assertEqual(tz._isdst(dt),
+                             time.localtime(timestamp +
+                                            time.timezone).tm_isdst)
+        self.assertEqual(len(timeutils._get_dst_table().times) % 2, 0)
+        self.assertEqual(tz._isdst(datetime.datetime(1900, 7, 1)),
+                         time.localtime(-2192963400).tm_isdst)
+
+    def test_batch(self):
+        times = [1615705200 + 1800 * i for i in range(-10, 10)]
+        local = timeutils.utc_to_local_timestamps(times)
+        self.assertEqual(local, [calendar.timegm(
+            datetime.datetime.fromtimestamp(t).timetuple()) for t in times])
+        self.assertEqual(timeutils.local_to_utc_timestamps(local), times)
+        # 2021-03-14 10:00 EDT
+        self.assertEqual(timeutils.local_to_utc_timestamps([1615716000]),
+                         [1615730400])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_batch_arrays(self):
+        # around both 2021 transitions, and one time outside the table
+        times = ([1615705200 + 1800 * i for i in range(-10, 10)] +
+                 [1636264800 + 1800 * i for i in range(-10, 10)] +
+                 [-2192963400, 1615705200 - 1])
+        local = timeutils.utc_to_local_timestamps(times)
+        for shape in ((len(times),), (6, 7)):
+            array = numpy.array(times, dtype='int64').reshape(shape)
+            result = timeutils.utc_to_local_timestamps(array)
+            self.assertEqual(result.shape, shape)
+            self.assertEqual(result.ravel().tolist(), local)
+
+            array = numpy.array(local, dtype='int64').reshape(shape)
+            result = timeutils.local_to_utc_timestamps(array)
+            self.assertEqual(result.shape, shape)
+            self.assertEqual(result.ravel().tolist(),
+                             timeutils.local_to_utc_timestamps(local))
+
+
+if __name__ == '__main__':
+    unittest.main()
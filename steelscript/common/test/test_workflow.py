@@ -0,0 +1,65 @@
+# Copyright (c) 2019 Riverbed Technology, Inc.
+#
+# This software is licensed under the terms and conditions of the MIT License
+# accompanying the software ("License").  This software is distributed "AS IS"
+# as set forth in the License.
+
+import time
+import unittest
+
+from steelscript.common.workflow import Job, WorkflowRunner
+from steelscript.common.exceptions import RvbdTimeoutException
+
+
+class FakeAppliance(object):
+    """Jobs complete `duration` seconds after they are created."""
+
+    def __init__(self, duration):
+        self.duration = duration
+        self.jobs = {}
+        self.polls = 0
+
+    def create(self, name):
+        self.jobs[name] = time.monotonic()
+        return {'id': name}
+
+    def status(self, handle):
+        self.polls += 1
+        elapsed = time.monotonic() - self.jobs[handle['id']]
+        return {'done': elapsed >= self.duration}
+
+    def job(self, name, **kwargs):
+        return Job(lambda: self.create(name), self.status,
+                   done=lambda s: s['done'],
+                   results=lambda h, s: h['id'].upper(),
+                   name='fake', min_interval=0.01, max_interval=0.05,
+                   **kwargs)
+
+
+class WorkflowTests(unittest.TestCase):
+
+    def setUp(self):
+        self.runner = WorkflowRunner(max_workers=2)
+        self.addCleanup(self.runner.close)
+
+    def test_run(self):
+        appliance = FakeAppliance(0.05)
+        jobs = [appliance.job('job%d' % i) for i in range(20)]
+        results = self.runner.run(jobs)
+        self.assertEqual(results, ['JOB%d' % i for i in range(20)])
+        self.assertIsNotNone(self.runner.stats.get('fake'))
+
+    def test_timeout(self):
+        appliance = FakeAppliance(10)
+        job = appliance.job('slow', timeout=0.05)
+        self.assertRaises(RvbdTimeoutException, self.runner.run, [job])
+
+        ok = appliance.job('ok')
+        ok.done = lambda s: True
+        results = self.runner.run([job, ok], return_exceptions=True)
+        self.assertIsInstance(results[0], RvbdTimeoutException)
+        self.assertEqual(results[1], 'OK')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,15 +10,30 @@ dates and times, in conjunction with the python `datetime` module.
 """
 
 import re
+import math
 import time
+import string
+import bisect
+import functools
 import calendar
-from datetime import datetime, timedelta, tzinfo, timezone
+import numbers
+from datetime import date, datetime, timedelta, tzinfo, timezone
 from decimal import Decimal
+from concurrent.futures import ProcessPoolExecutor
 from dateutil.relativedelta import relativedelta
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 __all__ = ['ensure_timezone', 'force_to_utc', 'datetime_to_seconds',
            'datetime_to_microseconds', 'datetime_to_nanoseconds',
            'usec_string_to_datetime', 'nsec_string_to_datetime',
+           'epoch_to_datetimes', 'sec_strings_to_datetimes',
+           'msec_strings_to_datetimes', 'usec_strings_to_datetimes',
+           'nsec_to_datetimes', 'floor_timestamps', 'round_timestamps',
+           'utc_to_local_timestamps', 'local_to_utc_timestamps',
            'timedelta_total_seconds', 'timedelta_str',
            'TimeParser', 'parse_timedelta', 'parse_range']
 
@@ -49,6 +64,75 @@ class tzutc(tzinfo):
     __reduce__ = object.__reduce__
 
 
+class _DSTTable(object):
+    """The local daylight saving transitions within `years` of now.
+
+    `times` is the sorted list of epoch times at which tm_isdst changes
+    and `states` the value of tm_isdst from each of those times on.  The
+    table is built by sampling time.localtime once a day and bisecting
+    to the second within days where tm_isdst changes.
+    """
+
+    def __init__(self, years=30):
+        span = years * 365 * 86400
+        self.start = int(time.time() - span) // 86400 * 86400
+        self.end = self.start + 2 * span
+        # time.tzset() replaces time.tzname, see _get_dst_table
+        self.tzname = time.tzname
+        self.times = []
+        self.states = []
+
+        localtime = time.localtime
+        t = self.start
+        self.first = prev = localtime(t).tm_isdst
+        while t < self.end:
+            cur = localtime(t + 86400).tm_isdst
+            if cur != prev:
+                lo, hi = t, t + 86400
+                while hi - lo > 1:
+                    mid = (lo + hi) // 2
+                    if localtime(mid).tm_isdst == prev:
+                        lo = mid
+                    else:
+                        hi = mid
+                self.times.append(hi)
+                self.states.append(cur)
+                prev = cur
+            t += 86400
+
+        # the period between transitions of the last lookup
+        self._last = (0, 0, 0)
+
+    def isdst(self, t):
+        """Return tm_isdst for the epoch time `t`."""
+        lo, hi, state = self._last
+        if lo <= t < hi:
+            return state
+        if not self.start <= t < self.end:
+            return time.localtime(t).tm_isdst
+
+        times = self.times
+        i = bisect.bisect_right(times, t)
+        lo = times[i - 1] if i else self.start
+        hi = times[i] if i < len(times) else self.end
+        state = self.states[i - 1] if i else self.first
+        self._last = (lo, hi, state)
+        return state
+
+
+_dst_table = None
+
+
+def _get_dst_table():
+    """Return the _DSTTable for the local timezone, building it on first
+    use and again if time.tzset() changed the timezone."""
+    global _dst_table
+    table = _dst_table
+    if table is None or table.tzname is not time.tzname:
+        table = _dst_table = _DSTTable()
+    return table
+
+
 class tzlocal(tzinfo):
 
     _std_offset = timedelta(seconds=-time.timezone)
@@ -101,7 +185,9 @@ class tzlocal(tzinfo):
                      + dt.hour * 3600
                      + dt.minute * 60
                      + dt.second)
-        return time.localtime(timestamp+time.timezone).tm_isdst
+        # equivalent to time.localtime(timestamp+time.timezone).tm_isdst,
+        # using the precomputed transitions
+        return _get_dst_table().isdst(timestamp+time.timezone)
 
     def __eq__(self, other):
         if not isinstance(other, tzlocal):
@@ -118,6 +204,54 @@ class tzlocal(tzinfo):
     __reduce__ = object.__reduce__
 
 
+def _local_offsets(times):
+    """Return the local UTC offset in seconds at each of the epoch
+    `times`, a sequence or NumPy array."""
+    std = -time.timezone
+    dst = -time.altzone if time.daylight else std
+    table = _get_dst_table()
+    if numpy is not None and isinstance(times, numpy.ndarray):
+        flat = times.ravel()
+        states = numpy.array([table.first] + table.states)[
+            numpy.searchsorted(table.times, flat, side='right')]
+        outside = (flat < table.start) | (flat >= table.end)
+        for i in numpy.flatnonzero(outside):
+            states[i] = table.isdst(flat[i].item())
+        return numpy.where(states > 0, dst, std).reshape(times.shape)
+    isdst = table.isdst
+    return [dst if isdst(t) > 0 else std for t in times]
+
+
+def utc_to_local_timestamps(times):
+    """Convert epoch times to local wall clock times.
+
+    The result for each time is the number of seconds from the epoch to
+    its local date and time, as if the local time were UTC.  This is the
+    bulk equivalent of `datetime.fromtimestamp(t)` without creating a
+    datetime per value.
+
+    `times` is a sequence of epoch seconds, or a NumPy array in which
+        case the conversion is vectorized and an array is returned.
+    """
+    if numpy is not None and isinstance(times, numpy.ndarray):
+        return times + _local_offsets(times)
+    return [t + offset for t, offset in zip(times, _local_offsets(times))]
+
+
+def local_to_utc_timestamps(times):
+    """Convert local wall clock times to epoch times.
+
+    This is the inverse of `utc_to_local_timestamps`, using the same UTC
+    offsets that `tzlocal` gives for a local datetime.
+    """
+    # like tzlocal._isdst, look up the offset as if the wall clock time
+    # were standard time
+    if numpy is not None and isinstance(times, numpy.ndarray):
+        return times - _local_offsets(times + time.timezone)
+    offsets = _local_offsets([t + time.timezone for t in times])
+    return [t - offset for t, offset in zip(times, offsets)]
+
+
 def ensure_timezone(dt):
     """Return a datetime object that corresponds to `dt` but that always has
     timezone info.
@@ -248,6 +382,117 @@ def string_to_datetime(s):
 nsec_string_to_datetime = nsec_to_datetime
 
 
+_EPOCH_UNITS = {'s': 1000000000, 'ms': 1000000, 'us': 1000, 'ns': 1}
+
+
+def _epoch_number(value):
+    """Return `value` as an int, float or Decimal."""
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return Decimal(value)
+    if isinstance(value, (float, Decimal)):
+        return value
+    return float(value)
+
+
+def _epoch_usec(value, scale):
+    """Return `value`, in units of `scale` nanoseconds, as a whole
+    number of microseconds rounded half to even like fromtimestamp.
+
+    Nanoseconds are converted through float seconds, as
+    `nsec_to_datetime` does, so that both give the same result.
+    """
+    if scale == 1:
+        frac, whole = math.modf(float(value) / 1000000000)
+        return int(whole) * 1000000 + int(round(frac * 1000000))
+    if isinstance(value, int):
+        usec, rem = divmod(value * scale, 1000)
+        if rem > 500 or (rem == 500 and usec & 1):
+            usec += 1
+        return usec
+    return int(round(Decimal(value) * scale / 1000))
+
+
+def epoch_to_datetimes(values, unit='s', datetime64=False, zero=True):
+    """Convert a sequence of times since the Unix epoch to datetimes.
+
+    This is the bulk counterpart of `sec_string_to_datetime`,
+    `msec_string_to_datetime`, `usec_string_to_datetime` and
+    `nsec_to_datetime`.
+
+    `values` is any sequence or array of integers, floats or numeric
+        strings.  Nanoseconds are rounded through float seconds like
+        `nsec_to_datetime`, which can differ from the exact value by a
+        microsecond.
+
+    `unit` is one of 's', 'ms', 'us' or 'ns'.
+
+    `datetime64` when True returns a NumPy array of datetime64[ns]
+        values in UTC, converted in a single vectorized pass.
+        Requires NumPy.  Otherwise a list of timezone aware datetime
+        objects in UTC is returned.
+
+    `zero` when False converts values of 0 to None (or NaT for
+        datetime64), as `nsec_to_datetime` does.
+    """
+    scale = _EPOCH_UNITS[unit]
+    if datetime64:
+        import numpy
+        arr = numpy.asarray(values)
+        if arr.dtype.kind in 'US':
+            try:
+                arr = arr.astype('int64')
+            except ValueError:
+                arr = arr.astype('float64')
+        if arr.dtype.kind == 'f':
+            # scale the whole and fractional parts separately, since
+            # epoch nanoseconds are beyond the precision of a float
+            whole = numpy.floor(arr)
+            ns = (whole.astype('int64') * scale +
+                  numpy.round((arr - whole) * scale).astype('int64'))
+        else:
+            ns = arr.astype('int64') * scale
+        result = ns.astype('datetime64[ns]')
+        if not zero:
+            result[ns == 0] = numpy.datetime64('NaT')
+        return result
+
+    epoch = datetime(1970, 1, 1, tzinfo=tzutc())
+    result = []
+    append = result.append
+    for value in values:
+        value = _epoch_number(value)
+        if not zero and value == 0:
+            append(None)
+        else:
+            append(epoch + timedelta(microseconds=_epoch_usec(value, scale)))
+    return result
+
+
+def sec_strings_to_datetimes(values, datetime64=False):
+    """Bulk version of `sec_string_to_datetime`."""
+    return epoch_to_datetimes(values, 's', datetime64)
+
+
+def msec_strings_to_datetimes(values, datetime64=False):
+    """Bulk version of `msec_string_to_datetime`."""
+    return epoch_to_datetimes(values, 'ms', datetime64)
+
+
+def usec_strings_to_datetimes(values, datetime64=False):
+    """Bulk version of `usec_string_to_datetime`."""
+    return epoch_to_datetimes(values, 'us', datetime64)
+
+
+def nsec_to_datetimes(values, datetime64=False):
+    """Bulk version of `nsec_to_datetime`, values of 0 become None."""
+    return epoch_to_datetimes(values, 'ns', datetime64, zero=False)
+
+
 def usec_string_to_timedelta(s):
     """Convert the string `s` which represents a number of microseconds
     to a timedelta object.
@@ -263,6 +508,32 @@ def timedelta_total_seconds(td):
     return float(td.microseconds + (td.seconds + td.days * 24 * 3600) * 10**6) / 10**6
 
 
+_shape_digits_re = re.compile(r'\d+')
+_shape_alpha_re = re.compile(r'[^\W\d_]+')
+_shape_space_re = re.compile(r'\s+')
+_directive_re = re.compile(r'%([a-zA-Z])')
+_char_classes = dict([(ord(c), '0') for c in '0123456789'] +
+                     [(ord(c), 'a') for c in string.ascii_letters])
+
+
+def _shape(s):
+    """Return the shape of the string `s`: runs of digits, letters and
+    whitespace are replaced by '0', 'a' and ' ' respectively, so for
+    example '12:30 PM 5/10' has the shape '0:0 a 0/0'."""
+    s = _shape_digits_re.sub('0', s)
+    s = _shape_alpha_re.sub('a', s)
+    return _shape_space_re.sub(' ', s)
+
+
+def _index_formats(formats):
+    """Return a dict mapping each shape to the `formats` that have it,
+    keeping their order."""
+    index = {}
+    for fmt in formats:
+        index.setdefault(fmt.shape, []).append(fmt)
+    return dict((shape, tuple(fmts)) for shape, fmts in index.items())
+
+
 # move out of TimeParser scope since Python3 won't allow it
 # ref: https://stackoverflow.com/a/13913933/2157429
 class _informat(object):
@@ -270,16 +541,19 @@ class _informat(object):
         self.pattern = pattern
         self.has_date = has_date
         self.has_year = has_year
+        self.shape = _shape(_directive_re.sub(
+            lambda m: 'a' if m.group(1) in 'pBb' else '0', pattern))
         if has_year:
             assert has_date
 
-    def match(self, s):
+    def match(self, s, now=None):
         tm = datetime.strptime(s, self.pattern)
 
         if self.has_year:
             return tm
 
-        now = datetime.now()
+        if now is None:
+            now = datetime.now()
         if self.has_date:
             return tm.replace(year=now.year)
 
@@ -323,27 +597,48 @@ class TimeParser(object):
     times into python `datetime.datetime` objects.
 
     This class is capable of parsing a variety of different formats.
-    On the first call, the method `parse()` may take some time, as it
-    tries a series of pre-defined formats one after another.  After
-    successfully parsing a string, the parser object remembers the format
-    that was used so subsequent calls with identically formatted strings
-    are as efficient as the underlying method `datetime.strptime`.
+    On the first call, the method `parse()` picks the pre-defined formats
+    with the same shape as the string (see `_shape`) and tries only
+    those.  After successfully parsing a string, the parser object
+    remembers the format that was used so subsequent calls with
+    identically formatted strings are as efficient as the underlying
+    method `datetime.strptime`.
     """
     def __init__(self):
         """ Construct a new TimeParser object """
         self._fmt = None
 
     @classmethod
-    def _parse_no_hint(cls, s):
+    def _parse_no_hint(cls, s, now=None):
         """Parse string s as a date/time without any hint about the format.
 
         If it can be parsed, returns a tuple of the datetime object
         and the format object that was used.  If the string cannot be
         parsed, raises ValueError.
+
+        `now` is used to fill in the date for strings that do not
+        include one, and defaults to the current time.
         """
+        # only formats with the same shape as s can match it, so try
+        # those first, then fall back to every other format in case
+        # strptime is more lenient than the shape suggests
+        index = cls.__dict__.get('_shape_index')
+        if index is None:
+            index = cls._shape_index = _index_formats(cls._formats)
+
+        shape = _shape(s)
+        for fmt in index.get(shape, ()):
+            try:
+                dt = fmt.match(s, now)
+                return dt, fmt
+            except ValueError:
+                pass
+
         for fmt in cls._formats:
+            if fmt.shape == shape:
+                continue
             try:
-                dt = fmt.match(s)
+                dt = fmt.match(s, now)
                 return dt, fmt
             except ValueError:
                 pass
@@ -378,6 +673,71 @@ class TimeParser(object):
         dt, self._fmt = self._parse_no_hint(s)
         return dt
 
+    def parse_many(self, strings, processes=None, chunksize=50000):
+        """Parse each string in `strings` as a date and time.
+
+        Returns a list of `datetime.datetime` objects in the same order,
+        or raises `ValueError` if any string cannot be parsed.
+
+        This is equivalent to calling `parse()` on each string, but
+        faster for large inputs: the format used for each shape of
+        string is remembered, so inputs that mix a few formats do not
+        have to search for the format again each time the format
+        changes, and strings without a date all use the same date.
+
+        `processes` optionally sets the number of worker processes used
+            to parse inputs of more than `chunksize` strings, in chunks
+            of `chunksize`.
+        """
+        strings = list(strings)
+        now = datetime.now()
+
+        if processes and processes > 1 and len(strings) > chunksize:
+            chunks = [strings[i:i + chunksize]
+                      for i in range(0, len(strings), chunksize)]
+            result = []
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                for parsed in executor.map(_parse_chunk, chunks,
+                                           [now] * len(chunks)):
+                    result.extend(parsed)
+            return result
+
+        return self._parse_many(strings, now)
+
+    def _parse_many(self, strings, now):
+        # remember the format found for each shape of string, so there
+        # are no failed strptime calls when the input switches between
+        # formats.  The key maps each character on its own, which is
+        # cheaper to compute than `_shape`.
+        by_key = {}
+        result = []
+        append = result.append
+        last = self._fmt
+        try:
+            for s in strings:
+                s = s.strip().replace('-', '/')
+                # like parse(), try the format of the previous string first
+                if last is not None:
+                    try:
+                        append(last.match(s, now))
+                        continue
+                    except ValueError:
+                        pass
+                key = s.translate(_char_classes)
+                fmt = by_key.get(key)
+                if fmt is not None and fmt is not last:
+                    try:
+                        append(fmt.match(s, now))
+                        last = fmt
+                        continue
+                    except ValueError:
+                        pass
+                dt, last = self._parse_no_hint(s, now)
+                by_key[key] = last
+                append(dt)
+        finally:
+            self._fmt = last
+        return result
 
     _formats = (
         (
@@ -394,6 +754,11 @@ class TimeParser(object):
      )
 
 
+def _parse_chunk(strings, now):
+    # runs in a worker process for TimeParser.parse_many
+    return TimeParser()._parse_many(strings, now)
+
+
 _timedelta_units = {
     'us': 0.000001, 'usec': 0.000001, 'microsecond': 0.000001, 'microseconds': 0.000001,
     'ms': 0.001, 'msec': 0.001, 'millisecond': 0.001, 'milliseconds': 0.001,
@@ -485,7 +850,7 @@ def round_time(dt=None, round_to=60, round_up=False, trim=False):
                    round_time(dt, round_to, True))
         return max(rounded) if max(rounded) <= dt else min(rounded)
 
-    seconds = (dt - dt.min.replace(tzinfo=dt.tzinfo)).seconds
+    seconds = dt.hour * 3600 + dt.minute * 60 + dt.second
     if round_up:
         rounding = (seconds + round_to / 2) // round_to * round_to
     else:
@@ -493,12 +858,14 @@ def round_time(dt=None, round_to=60, round_up=False, trim=False):
     return dt + timedelta(0, rounding - seconds, -dt.microsecond)
 
 
+@functools.lru_cache(maxsize=256)
 def parse_timedelta(s):
     """Parse the string `s` representing some duration of time
     (e.g., `"3 seconds"` or `"1 week"`) and return a `datetime.timedelta`
     object representing that length of time.
 
-    If the string cannot be parsed, raises `ValueError`.
+    If the string cannot be parsed, raises `ValueError`.  Results are
+    cached, since the same few durations tend to be parsed repeatedly.
     """
 
     m = _timedelta_re.match(s)
@@ -521,7 +888,16 @@ def parse_timedelta(s):
     return timedelta(seconds=units * float(val))
 
 
-def floor_dt(dt, unit, begin_monday=False):
+# fields that floor_dt resets for each unit
+_floor_fields = ['year', 'month', 'day', 'hour', 'minute', 'second']
+_floor_starts = {'month': 1, 'day': 1, 'hour': 0, 'minute': 0, 'second': 0}
+_floor_resets = dict(
+    (unit, dict([(f, _floor_starts[f]) for f in _floor_fields[i + 1:]] +
+                [('microsecond', 0)]))
+    for i, unit in enumerate(_floor_fields))
+
+
+def floor_dt(dt, unit, begin_monday=False, keep_tzinfo=False):
     """Derive the most recent start datetime of the current duration unit.
     i.e., for datetime(2016, 12, 14, 10, 14) and hour, should return
     datetime(2016, 12, 14, 10, 0)
@@ -529,47 +905,337 @@ def floor_dt(dt, unit, begin_monday=False):
     :param dt: datetime value
     :param unit: string, duration unit: year, quarter, month, week, day,
         hour, minute, second.
-    :return : datetime.
+    :param keep_tzinfo: if True, return a datetime with the tzinfo and
+        fold of `dt`, and raise ValueError for an unknown unit.
+    :return : naive datetime, unless `keep_tzinfo` is set.
     """
 
     if unit == 'week':
         offset = 0 if begin_monday else 1
         dt = dt - timedelta(days=dt.weekday() + offset)
-        return floor_dt(dt, 'day')
+        return floor_dt(dt, 'day', keep_tzinfo=keep_tzinfo)
 
     if unit == 'quarter':
         # Update the month to be first of current quarter
-        dt = dt.replace(month=(dt.month - 1)//3 * 3 + 1)
-        return floor_dt(dt, 'month')
+        dt = dt.replace(month=(dt.month - 1)//3 * 3 + 1, day=1)
+        return floor_dt(dt, 'month', keep_tzinfo=keep_tzinfo)
+
+    resets = _floor_resets.get(unit)
+    if resets is None:
+        if keep_tzinfo:
+            raise ValueError('Invalid duration unit: %s' % unit)
+        # unknown units only drop the microseconds
+        resets = _floor_resets['second']
+
+    dt = dt.replace(**resets)
+    if keep_tzinfo:
+        return dt
+    return datetime(dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second)
 
-    start_month, start_day, start_hour, start_minute, start_second = \
-        1, 1, 0, 0, 0
 
-    kwargs, smaller_unit = {}, False
+# units that floor_timestamps handles with floor_dt rather than a
+# fixed number of seconds
+_calendar_units = ('week', 'month', 'quarter', 'year')
+_unit_seconds = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
 
-    for u in ['year', 'month', 'day', 'hour', 'minute', 'second']:
-        if smaller_unit:
-            kwargs[u] = eval('start_' + u)
-        else:
-            kwargs[u] = getattr(dt, u)
 
-        if not smaller_unit and u == unit:
-            smaller_unit = True
+def _step_seconds(step):
+    """Return `step` as a number of seconds, or None for calendar units."""
+    if isinstance(step, str):
+        if step in _calendar_units:
+            return None
+        if step in _unit_seconds:
+            return _unit_seconds[step]
+        step = parse_timedelta(step)
+    if isinstance(step, timedelta):
+        seconds = step.total_seconds()
+        return int(seconds) if seconds == int(seconds) else seconds
+    return step
 
-    return datetime(**kwargs)
 
+class _UTCOffsets(object):
+    """UTC offsets in seconds of the timezone `tz`.
 
-def parse_range(s, begin_monday=False):
-    """Parse the string `s` representing a range of times
-    (e.g., `"12:00 PM to 1:00 PM"` or `"last 2 weeks"`).
+    Offsets are taken from `datetime.fromtimestamp` and cached for each
+    hour of epoch time.  A transition within an hour, as in zones with
+    half hour offsets, is found to the second, so each hour has an entry
 
-    Upon success returns a pair of `datetime.datetime` objects
-    representing the beginning and end of the time range.
-    If the string cannot be parsed, raises `ValueError`.
+        (transition, offset before, offset after, fold start, fold end)
+
+    Times from fold start up to fold end repeat the local time of an
+    earlier time after clocks were set back, which `fromtimestamp`
+    marks with fold=1.  At most one transition per hour is assumed.
+    """
+
+    _epoch = datetime(1970, 1, 1)
+    _second = timedelta(seconds=1)
+
+    def __init__(self, tz):
+        self.tz = tz
+        self.boundaries = {}
+        self.transitions = {}
+        self.entries = {}
+        # epoch times of local times, for fold=0 and fold=1
+        self.starts = ({}, {})
+
+    def offset(self, t):
+        wall = datetime.fromtimestamp(t, self.tz).replace(tzinfo=None)
+        return (wall - self._epoch) // self._second - t
+
+    def _last_second(self, hour):
+        # offset at the last second before `hour`, shared by the hours
+        # on either side
+        offset = self.boundaries.get(hour)
+        if offset is None:
+            offset = self.boundaries[hour] = self.offset(hour * 3600 - 1)
+        return offset
+
+    def _transition(self, hour):
+        transition = self.transitions.get(hour)
+        if transition is None:
+            # from the last second of the previous hour, so that
+            # transitions on the hour belong to this hour
+            lo = hour * 3600 - 1
+            hi = lo + 3600
+            before = self._last_second(hour)
+            after = self._last_second(hour + 1)
+            if before == after:
+                transition = (hi + 1, before, after)
+            else:
+                while hi - lo > 1:
+                    mid = (lo + hi) // 2
+                    if self.offset(mid) == before:
+                        lo = mid
+                    else:
+                        hi = mid
+                transition = (hi, before, after)
+            self.transitions[hour] = transition
+        return transition
+
+    def entry(self, hour):
+        entry = self.entries.get(hour)
+        if entry is None:
+            hour = int(hour)
+            transition, before, after = self._transition(hour)
+            fold_start = fold_end = 0
+            # clocks set back within the last day may repeat local
+            # times in this hour, which shows as a larger offset a day
+            # earlier
+            if self._transition(hour - 24)[1] > after:
+                for h in range(hour - 24, hour + 1):
+                    t, b, a = self._transition(h)
+                    if a < b and t + b - a > hour * 3600:
+                        fold_start, fold_end = t, t + b - a
+            entry = (transition, before, after, fold_start, fold_end)
+            self.entries[hour] = entry
+        return entry
+
+    def at(self, t):
+        """Return the offset at the epoch time `t`."""
+        entry = self.entry(t // 3600)
+        return entry[1] if t < entry[0] else entry[2]
+
+    def utc(self, local, fold):
+        """Return the epoch time of `local`, a local time in seconds
+        since the local epoch, as `fold` selects in repeated hours.
+
+        Local times skipped when clocks were set forward give the time
+        of the transition.
+        """
+        starts = self.starts[fold]
+        t = starts.get(local)
+        if t is None:
+            dt = self._epoch + timedelta(seconds=local)
+            offset = dt.replace(tzinfo=self.tz, fold=fold).utcoffset()
+            t = local - offset // self._second
+            skipped = t + self.at(t) - local
+            if skipped:
+                # find the first second with a local time after `local`
+                lo, hi = int(t) - 2 * abs(skipped), int(t) + 2 * abs(skipped)
+                while hi - lo > 1:
+                    mid = (lo + hi) // 2
+                    if mid + self.at(mid) < local:
+                        lo = mid
+                    else:
+                        hi = mid
+                t = hi
+            starts[local] = t
+        return t
+
+    def array(self, values):
+        """Return the offsets and folds at `values`, a 1-d NumPy array."""
+        hours = numpy.floor_divide(values, 3600).astype('int64')
+        unique, inverse = numpy.unique(hours, return_inverse=True)
+        table = numpy.array([self.entry(int(h)) for h in unique],
+                            dtype='int64').reshape(-1, 5)
+        entries = table[inverse.reshape(-1)]
+        offsets = numpy.where(values < entries[:, 0],
+                              entries[:, 1], entries[:, 2])
+        folds = ((entries[:, 3] <= values) &
+                 (values < entries[:, 4])).astype('int64')
+        return offsets, folds
+
+    def utc_array(self, local, folds):
+        """Return `utc` for NumPy arrays of local times and folds."""
+        keys = numpy.stack([local, folds], axis=1)
+        unique, inverse = numpy.unique(keys, axis=0, return_inverse=True)
+        table = numpy.array([self.utc(l.item(), int(f)) for l, f in unique])
+        return table[inverse.reshape(-1)]
+
+
+_epoch_date = date(1970, 1, 1)
+
+
+def _floor_day(day, unit, begin_monday):
+    # local midnight that starts the `unit` containing the local day
+    # number `day`, in seconds since the local epoch, as floor_dt
+    d = _epoch_date + timedelta(days=int(day))
+    if unit == 'week':
+        d -= timedelta(days=d.weekday() + (0 if begin_monday else 1))
+    elif unit == 'month':
+        d = d.replace(day=1)
+    elif unit == 'quarter':
+        d = d.replace(month=(d.month - 1) // 3 * 3 + 1, day=1)
+    else:
+        d = d.replace(month=1, day=1)
+    return (d - _epoch_date).days * 86400
+
+
+def floor_timestamps(values, step, tz=None, begin_monday=False):
+    """Floor a sequence of epoch times to the start of their bucket.
+
+    This is the bulk counterpart of `floor_dt` for times given as
+    seconds since the Unix epoch: each result is the time at which the
+    bucket of `datetime.fromtimestamp(t, tz)` starts, with the fold of
+    that datetime in repeated local hours.  A bucket that would start
+    at a local time skipped when clocks were set forward starts at the
+    transition instead, so that no result is later than its value.  UTC
+    offsets are looked up once per hour of input rather than once per
+    value.
+
+    `values` is a sequence of epoch seconds, or a NumPy array, in which
+        case the result is a NumPy array computed in a vectorized pass.
+
+    `step` is a number of seconds, a `datetime.timedelta`, a unit
+        ('second', 'minute', 'hour', 'day', 'week', 'month', 'quarter',
+        'year') or a string for `parse_timedelta`.
+
+    `tz` is the tzinfo to bucket in, defaulting to UTC.
+
+    `begin_monday` starts weeks on Monday instead of Sunday.
+
+    Returns a list of epoch seconds.
     """
+    if tz is None:
+        tz = tzutc()
+    seconds = _step_seconds(step)
+    vectorized = numpy is not None and isinstance(values, numpy.ndarray)
+
+    if seconds is not None and isinstance(tz, (tzutc, timezone)):
+        # fixed offset
+        offset = tz.utcoffset(None) // timedelta(seconds=1)
+        if vectorized:
+            return values - (values + offset) % seconds
+        return [t - (t + offset) % seconds for t in values]
+
+    offsets = _UTCOffsets(tz)
+    # like floor_dt, the day arithmetic for weeks does not keep the fold
+    keep_fold = step != 'week'
+
+    if vectorized:
+        flat = values.ravel()
+        offset, folds = offsets.array(flat)
+        local = flat + offset
+        if seconds is None:
+            days, inverse = numpy.unique(local // 86400, return_inverse=True)
+            table = numpy.array([_floor_day(d, step, begin_monday)
+                                 for d in days], dtype='int64')
+            local = table[inverse.reshape(-1)]
+        else:
+            local = local - local % seconds
+        if not keep_fold:
+            folds = numpy.zeros_like(folds)
+
+        # most buckets start with the offset and fold of their values
+        start = local - offset
+        start_offset, start_folds = offsets.array(start)
+        other = (start_offset != offset) | (start_folds != folds)
+        if other.any():
+            start[other] = offsets.utc_array(local[other], folds[other])
+        return start.reshape(values.shape)
+
+    result = []
+    append = result.append
+    entries = offsets.entries
+    days = {}
+    for t in values:
+        hour = t // 3600
+        entry = entries[hour] if hour in entries else offsets.entry(hour)
+        offset = entry[1] if t < entry[0] else entry[2]
+        fold = entry[3] <= t < entry[4] and keep_fold
+        local = t + offset
+        if seconds is None:
+            day = local // 86400
+            local = days.get(day)
+            if local is None:
+                local = days[day] = _floor_day(day, step, begin_monday)
+        else:
+            local -= local % seconds
+
+        # most buckets start with the offset and fold of their values
+        start = local - offset
+        hour = start // 3600
+        entry = entries[hour] if hour in entries else offsets.entry(hour)
+        if ((entry[1] if start < entry[0] else entry[2]) == offset and
+                (entry[3] <= start < entry[4]) == fold):
+            append(start)
+        else:
+            append(offsets.utc(local, int(fold)))
+    return result
+
 
-    s = s.strip()
+def round_timestamps(values, step, tz=None):
+    """Round a sequence of epoch times to the nearest bucket boundary.
 
+    Halfway values round up.  `values`, `step` and `tz` are as for
+    `floor_timestamps`, except that `step` must have a fixed length.
+    """
+    seconds = _step_seconds(step)
+    if seconds is None:
+        raise ValueError('Cannot round to calendar unit: %s' % step)
+    # for integer times and steps, t + seconds // 2 falls in the same
+    # bucket as t + seconds / 2 and keeps the results integers
+    half = seconds / 2
+    int_half = seconds // 2 if isinstance(seconds, int) else half
+    if numpy is not None and isinstance(values, numpy.ndarray):
+        if values.dtype.kind in 'iu':
+            return floor_timestamps(values + int_half, seconds, tz)
+        return floor_timestamps(values + half, seconds, tz)
+    return floor_timestamps([t + (int_half if t.__class__ is int else half)
+                             for t in values], seconds, tz)
+
+
+def _parse_pair(first, second):
+    """Parse two time strings, returning the plan that `_resolve_range`
+    uses to parse them again without searching for their formats."""
+    p = TimeParser()
+    start = p.parse(first)
+    start_fmt = p._fmt
+    end = p.parse(second)
+    if start_fmt.has_year and p._fmt.has_year:
+        return ('absolute', start, end)
+    return ('times',
+            start_fmt, first.strip().replace('-', '/'),
+            p._fmt, second.strip().replace('-', '/'))
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_range_plan(s):
+    """Parse the range string `s` into a plan for `_resolve_range`.
+
+    The plan does not depend on the current time, so it can be cached
+    and only resolved against the current time on each call.
+    """
     if s == 'today':
         s = 'this day'
     elif s == 'yesterday':
@@ -579,20 +1245,14 @@ def parse_range(s, begin_monday=False):
     i = s.split('to')
     if len(i) == 2:
         try:
-            p = TimeParser()
-            start = p.parse(i[0])
-            end = p.parse(i[1])
-            return start, end
+            return _parse_pair(i[0], i[1])
         except ValueError:
             pass
 
     # try something of the form "last time"
     if s.startswith('last'):
         try:
-            duration = parse_timedelta(s[4:].strip())
-            end = datetime.now()
-            start = end - duration
-            return start, end
+            return ('last', parse_timedelta(s[4:].strip()))
         except ValueError:
             pass
 
@@ -601,7 +1261,6 @@ def parse_range(s, begin_monday=False):
         try:
             duration = s[8:].strip()
             unit = units_map[_timedelta_re.match(duration).group(2)]
-            now = datetime.now()
 
             how_many = _timedelta_re.match(duration).group(1)
             how_many = 1 if how_many == '' else int(how_many)
@@ -611,10 +1270,8 @@ def parse_range(s, begin_monday=False):
             else:
                 delta = relativedelta(**{unit+'s': how_many})
 
-            start = floor_dt(now - delta, unit, begin_monday)
-            end = floor_dt(now, unit, begin_monday)
-
-            return start, end
+            # store the negated delta, relativedelta.__neg__ is slow
+            return ('previous', unit, -delta)
 
         except ValueError:
             pass
@@ -623,11 +1280,7 @@ def parse_range(s, begin_monday=False):
         try:
             duration = s[4:].strip()
             unit = units_map[_timedelta_re.match(duration).group(2)]
-            now = datetime.now()
-
-            start = floor_dt(now, unit, begin_monday)
-
-            return start, now
+            return ('this', unit)
 
         except ValueError:
             pass
@@ -643,16 +1296,51 @@ def parse_range(s, begin_monday=False):
     # with daylight savings
     if len(i) >= 2:
         try:
-            p = TimeParser()
-            start = p.parse(i[0])
-            end = p.parse(i[1])
-            return start, end
+            return _parse_pair(i[0], i[1])
         except ValueError:
             pass
 
     raise ValueError('cannot parse time range "%s"' % s)
 
 
+def _resolve_range(plan, begin_monday):
+    """Return the (start, end) pair for a plan from `_parse_range_plan`."""
+    kind = plan[0]
+    if kind == 'absolute':
+        return plan[1], plan[2]
+
+    now = datetime.now()
+    if kind == 'times':
+        start_fmt, start, end_fmt, end = plan[1:]
+        return start_fmt.match(start, now), end_fmt.match(end, now)
+
+    if kind == 'last':
+        return now - plan[1], now
+
+    if kind == 'previous':
+        unit, back = plan[1:]
+        return (floor_dt(now + back, unit, begin_monday),
+                floor_dt(now, unit, begin_monday))
+
+    # kind == 'this'
+    return floor_dt(now, plan[1], begin_monday), now
+
+
+def parse_range(s, begin_monday=False):
+    """Parse the string `s` representing a range of times
+    (e.g., `"12:00 PM to 1:00 PM"` or `"last 2 weeks"`).
+
+    Upon success returns a pair of `datetime.datetime` objects
+    representing the beginning and end of the time range.
+    If the string cannot be parsed, raises `ValueError`.
+
+    The parsed form of recently used strings is cached, so repeated
+    calls with the same string only recompute the times relative to
+    the current time.
+    """
+    return _resolve_range(_parse_range_plan(s.strip()), begin_monday)
+
+
 # XXX probably incorrect in some locales?
 _fmt_widths = {
     'a': 3, 'A': 9, 'b': 3, 'B': 9, 'c': 24,
@@ -0,0 +1,201 @@
+# Copyright (c) 2019 Riverbed Technology, Inc.
+#
+# This software is licensed under the terms and conditions of the MIT License
+# accompanying the software ("License").  This software is distributed "AS IS"
+# as set forth in the License.
+
+"""
+Run many "create job -> poll status -> fetch results" workflows against
+one or more appliances concurrently.
+
+Each step of a `Job` is an ordinary blocking callable, typically a
+`Connection.json_request` call.  A `WorkflowRunner` runs the steps on a
+small shared thread pool and waits between polls on a single event loop
+thread, so a job that is waiting for the appliance does not hold a
+thread:
+
+    >>> def create():
+    ...     return svc.conn.json_request('POST', '/api/report/1.0/jobs',
+    ...                                  body=criteria)
+    >>> job = Job(create,
+    ...           status=lambda j: svc.conn.json_request('GET', j['href']),
+    ...           done=lambda s: s['state'] == 'completed',
+    ...           results=lambda j, s: svc.conn.json_request(
+    ...               'GET', j['href'] + '/data'),
+    ...           name='report')
+    >>> runner = WorkflowRunner()
+    >>> data = runner.run([job])[0]
+
+Poll intervals start at `min_interval` and back off towards
+`max_interval`.  Jobs with the same `name` share statistics about how
+long they take to complete, and later jobs wait about that long before
+their first poll rather than polling a slow job repeatedly.
+"""
+
+import asyncio
+import logging
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from steelscript.common.polling import CompletionStats, poll_async
+
+__all__ = ['Job', 'WorkflowRunner']
+
+logger = logging.getLogger(__name__)
+
+
+class Job(object):
+    """A single create -> poll -> fetch workflow."""
+
+    def __init__(self, create, status, done, results=None, name=None,
+                 min_interval=1, max_interval=30, backoff=1.5,
+                 timeout=None):
+        """Define a new job.
+
+        `create` is called with no arguments to start the job on the
+            appliance, and returns a handle for the job, such as the
+            decoded JSON response.
+
+        `status` is called with the handle and returns the current status.
+
+        `done` is called with the status and returns True once the job
+            is complete.  It may raise an exception to fail the job.
+
+        `results` is optionally called with the handle and final status,
+            and its return value is the result of the job.  If not set,
+            the final status is the result.
+
+        `name` identifies jobs of the same kind, whose completion times
+            are used to choose the first poll interval.
+
+        `min_interval` and `max_interval` bound the number of seconds
+            between polls, which grows by a factor of `backoff` after
+            each incomplete poll.
+
+        `timeout` is the maximum number of seconds to wait for the job
+            to complete, after which RvbdTimeoutException is raised.
+
+        See `steelscript.common.polling.PollSchedule` for how intervals
+        are chosen.
+        """
+        self.create = create
+        self.status = status
+        self.done = done
+        self.results = results
+        self.name = name
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.timeout = timeout
+
+    def __repr__(self):
+        return '<%s %s>' % (self.__class__.__name__, self.name or id(self))
+
+
+class WorkflowRunner(object):
+    """Run jobs concurrently on one event loop and a shared thread pool.
+
+    The event loop runs in a daemon thread started on first use, so a
+    single runner can be shared by the whole application and used from
+    any thread.
+    """
+
+    def __init__(self, max_workers=16):
+        """Create a runner.
+
+        `max_workers` is the number of threads used for the blocking
+            create, status and results calls.  Jobs waiting between polls
+            do not use a thread.
+        """
+        self.max_workers = max_workers
+        self.stats = CompletionStats()
+
+        self._executor = None
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._loop is not None:
+                return self._loop
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix='workflow')
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever,
+                                            name='workflow-scheduler',
+                                            daemon=True)
+            self._thread.start()
+            return self._loop
+
+    def close(self):
+        """Stop the scheduler thread and the thread pool."""
+        with self._lock:
+            if self._loop is None:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._executor.shutdown(wait=True)
+            self._loop = self._thread = self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    async def _call(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor,
+                                          functools.partial(func, *args))
+
+    async def _run(self, job):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        handle = await self._call(job.create)
+        logger.debug('%r created' % job)
+
+        schedule = self.stats.schedule(job.name,
+                                       min_interval=job.min_interval,
+                                       max_interval=job.max_interval,
+                                       backoff=job.backoff)
+        status = await poll_async(job.status, handle, until=job.done,
+                                  schedule=schedule, deadline=job.timeout,
+                                  name=job.name, stats=self.stats,
+                                  executor=self._executor)
+        logger.debug('%r completed in %.1f seconds'
+                     % (job, loop.time() - start))
+
+        if job.results is None:
+            return status
+        return await self._call(job.results, handle, status)
+
+    def submit(self, job):
+        """Start `job` and return a `concurrent.futures.Future` for its
+        result."""
+        loop = self._start()
+        return asyncio.run_coroutine_threadsafe(self._run(job), loop)
+
+    def run(self, jobs, return_exceptions=False):
+        """Run all of `jobs` concurrently and wait for them to finish.
+
+        Returns the list of results in the same order as `jobs`.  If any
+        job fails its exception is raised, unless `return_exceptions` is
+        True, in which case the exception takes the place of the result.
+        """
+        futures = [self.submit(job) for job in jobs]
+        results = []
+        for f in futures:
+            try:
+                results.append(f.result())
+            except Exception as e:
+                if not return_exceptions:
+                    for other in futures:
+                        other.cancel()
+                    raise
+                results.append(e)
+        return results